@@ -10,11 +10,14 @@ import hashlib
 from database import execute_query, fetch_one, fetch_all
 from models import UserRegister, UserLogin, RequestSubmit
 from auth import hash_password, verify_password
+from http_cache import static_url
 
 app = FastAPI(title="Gestion des Requêtes Universitaires")
 #bim
 # Configuration des templates
 templates = Jinja2Templates(directory="templates")
+# base.html référence les fichiers statiques par static_url() (empreinte de contenu)
+templates.env.globals["static_url"] = static_url
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Clé secrète pour signer les cookies
@@ -37,7 +40,7 @@ def verify_user_cookie(cookie_data: str) -> dict:
         if not cookie_data:
             return None
         data_b64, signature = cookie_data.split(".")
-        if sign_data(data_b64) != signature:
+        if not hmac.compare_digest(sign_data(data_b64), signature):
             return None
         data_json = base64.b64decode(data_b64).decode()
         return json.loads(data_json)
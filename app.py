@@ -1,27 +1,88 @@
-from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, Cookie, Query, Header
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
+from typing import Optional
 import json
 import base64
 import hmac
 import hashlib
+import os
+import re
 
 #jjjjjjjjjj
 
-from database import execute_query, fetch_one, fetch_all
-from models import UserRegister, UserLogin, RequestSubmit
-from auth import hash_password, verify_password
+from database import (execute_query, execute_grouped, execute_many, fetch_one, fetch_all,
+                      get_db_path, get_db_stats, init_schema, shutdown_database, test_connection,
+                      OVERLOAD_ERRORS, DB_RETRY_AFTER)
+from pydantic import ValidationError
+from models import (UserRegister, UserLogin, RequestSubmit, ClaimRequest, StatusUpdate, bind_form,
+                    format_validation_error)
+import queries
+from cache import TTLCache
+from templating import templates, stream_template, warm_up, render_report, TEMPLATE_WARM_UP
+from http_cache import CachedStaticFiles, render_public_page
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page, decode_cursor
+import metrics
+import user_cache
+from ratelimit import RateLimited, client_ip, limiter
+import bulk
+import processing
+import search
+from auth import (hash_password_async, verify_password_async, needs_rehash,
+                  password_service, PasswordServiceBusy)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schéma et migrations au démarrage plutôt qu'à l'import du module
+    await init_schema()
+    # Compiler les templates avant la première requête utilisateur
+    if TEMPLATE_WARM_UP:
+        warm_up()
+    yield
+    # Arrêt d'un worker : sans cela, le pool de hachage (processus) empêche sa sortie
+    password_service.shutdown()
+    await shutdown_database()
+
+
+app = FastAPI(title="Gestion des Requêtes Universitaires", lifespan=lifespan)
+# Durée de chaque requête par route, exposée par /metrics
+app.add_middleware(metrics.PrometheusMiddleware)
+
+
+async def database_overloaded(request: Request, exc: Exception):
+    """Base saturée ou requête trop longue : 503 immédiat plutôt qu'une file qui s'allonge"""
+    return JSONResponse(
+        {"status": "error", "message": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(DB_RETRY_AFTER)},
+    )
+
+
+for error in OVERLOAD_ERRORS:
+    app.add_exception_handler(error, database_overloaded)
 
-app = FastAPI(title="Gestion des Requêtes Universitaires")
+
+@app.exception_handler(RateLimited)
+async def rate_limited(request: Request, exc: RateLimited):
+    return JSONResponse(
+        {"status": "error", "message": str(exc)},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 #bim
-# Configuration des templates
-templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Configuration des templates : voir templating.py
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Clé secrète pour signer les cookies
 SECRET_KEY = "ma-cle-secrete-pour-les-cookies-2024"
 
+# Cookies déjà vérifiés : évite HMAC + base64 + JSON à chaque requête authentifiée
+session_cache = TTLCache(
+    maxsize=int(os.environ.get("SESSION_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("SESSION_CACHE_TTL", "300"))
+)
+
 def sign_data(data: str) -> str:
     """Signer les données du cookie"""
     return hmac.new(SECRET_KEY.encode(), data.encode(), hashlib.sha256).hexdigest()
@@ -38,11 +99,16 @@ def verify_user_cookie(cookie_data: str) -> dict:
     try:
         if not cookie_data:
             return None
+        user = session_cache.get(cookie_data)
+        if user is not None:
+            return dict(user)
         data_b64, signature = cookie_data.split(".")
-        if sign_data(data_b64) != signature:
+        if not hmac.compare_digest(sign_data(data_b64), signature):
             return None
         data_json = base64.b64decode(data_b64).decode()
-        return json.loads(data_json)
+        user = json.loads(data_json)
+        session_cache.set(cookie_data, user)
+        return dict(user)
     except:
         return None
 
@@ -74,35 +140,65 @@ def get_current_user(user_data: str = Cookie(None, alias="user_data")):
     return user
 
 
+# Jeton des routes d'administration (import / export) ; sans jeton, ces routes sont désactivées
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+
+
+def _busy_response(request: Request, template: str, error, status_code: int = 503, **context):
+    """Page réaffichée avec Retry-After (hachage ou base saturés : 503, limite atteinte : 429)"""
+    return templates.TemplateResponse(
+        template,
+        {"request": request, "error": str(error), **context},
+        status_code=status_code,
+        headers={"Retry-After": str(getattr(error, "retry_after", DB_RETRY_AFTER))}
+    )
+
+
+# Limitation de débit (voir ratelimit.py) : vérifiée avant la lecture du formulaire
+def limit_by_ip(rule: str):
+    async def dependency(request: Request):
+        await limiter.check(rule, client_ip(request))
+    return dependency
+
+
+async def charge_submissions(request: Request, current_user: dict, count: int = 1):
+    """Consommer ``count`` jetons de soumission (une requête créée = un jeton)"""
+    await limiter.check("submit_ip", client_ip(request), count)
+    await limiter.check("submit_user", current_user['user_id'], count)
+
+
+async def limit_submissions(request: Request, current_user: dict = Depends(get_current_user)):
+    await charge_submissions(request, current_user)
+
 
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("base.html", {"request": request})
+    return render_public_page(request, "base.html")
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_form(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return render_public_page(request, "register.html")
 
-@app.post("/register")
+@app.post("/register", dependencies=[Depends(limit_by_ip("register_ip"))])
 async def register_user(request: Request):
     form_data = await request.form()
     
     try:
-        user_data = UserRegister(
-            matricule=form_data.get("matricule"),
-            name=form_data.get("name"),
-            last_name=form_data.get("last_name"),
-            email=form_data.get("email"),
-            phone=form_data.get("phone"),
-            password=form_data.get("password")
-        )
+        user_data = UserRegister.model_validate(bind_form(form_data, UserRegister))
         
         # Vérifier si l'email ou matricule existe déjà
         user_exists = await fetch_one(
-            "SELECT user_id FROM users WHERE email = ? OR matricule = ?",
+            queries.USER_EXISTS,
             (user_data.email, user_data.matricule)
         )
         
@@ -111,13 +207,22 @@ async def register_user(request: Request):
         
         # Créer l'utilisateur
         await execute_query(
-            "INSERT INTO users (matricule, name, last_name, email, phone, password) VALUES (?, ?, ?, ?, ?, ?)",
+            queries.INSERT_USER,
             (user_data.matricule, user_data.name, user_data.last_name, 
-             user_data.email, user_data.phone, hash_password(user_data.password))
+             user_data.email, user_data.phone, await hash_password_async(user_data.password))
         )
             
         return RedirectResponse(url="/login", status_code=303)
         
+    except ValidationError as e:
+        return templates.TemplateResponse("register.html", {
+            "request": request,
+            "error": format_validation_error(e)
+        })
+    except PasswordServiceBusy as e:
+        return _busy_response(request, "register.html", e)
+    except OVERLOAD_ERRORS as e:
+        return _busy_response(request, "register.html", e)
     except Exception as e:
         return templates.TemplateResponse("register.html", {
             "request": request, 
@@ -126,9 +231,9 @@ async def register_user(request: Request):
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_form(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return render_public_page(request, "login.html")
 
-@app.post("/login")
+@app.post("/login", dependencies=[Depends(limit_by_ip("login_ip"))])
 async def login_user(request: Request):
     form_data = await request.form()
     
@@ -137,14 +242,16 @@ async def login_user(request: Request):
             login=form_data.get("login"),
             password=form_data.get("password")
         )
+        # Essais par compte, avant toute vérification Argon2
+        await limiter.check("login_matricule", login_data.login.strip().lower())
         
         # Chercher l'utilisateur par email ou matricule
         user = await fetch_one(
-            "SELECT user_id, matricule, name, last_name, email, password FROM users WHERE email = ? OR matricule = ?",
+            queries.USER_FOR_LOGIN,
             (login_data.login, login_data.login)
         )
         
-        if not user or not verify_password(login_data.password, user['password']):
+        if not user or not await verify_password_async(login_data.password, user['password']):
             raise HTTPException(status_code=400, detail="Identifiants incorrects")
         
         # Créer les données utilisateur pour le cookie
@@ -160,14 +267,39 @@ async def login_user(request: Request):
         
         response = RedirectResponse(url="/dashboard", status_code=303)
         response.set_cookie(key="user_data", value=user_cookie, httponly=True, max_age=24*60*60)
+        if needs_rehash(user['password']):
+            # Profil Argon2 modifié : nouveau hash après l'envoi de la réponse
+            response.background = BackgroundTask(
+                _rehash_password, user['user_id'], user['password'], login_data.password
+            )
         return response
             
+    except ValidationError as e:
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "error": format_validation_error(e)
+        })
+    except PasswordServiceBusy as e:
+        return _busy_response(request, "login.html", e)
+    except RateLimited as e:
+        return _busy_response(request, "login.html", e, status_code=429)
+    except OVERLOAD_ERRORS as e:
+        return _busy_response(request, "login.html", e)
     except Exception as e:
         return templates.TemplateResponse("login.html", {
             "request": request, 
             "error": str(e)
         })
 
+async def _rehash_password(user_id: int, old_hash: str, password: str):
+    """Recalculer un hash avec le profil Argon2 courant"""
+    try:
+        new_hash = await hash_password_async(password)
+    except PasswordServiceBusy:
+        # Service saturé : ce sera fait à la prochaine connexion
+        return
+    await execute_query(queries.UPDATE_USER_PASSWORD, (new_hash, user_id, old_hash))
+
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request, current_user: dict = Depends(get_current_user)):
     return templates.TemplateResponse("dashboard.html", {
@@ -182,52 +314,48 @@ async def submit_request_form(request: Request, current_user: dict = Depends(get
         "user": current_user
     })
 
-@app.post("/submit-request")
+def _insert_request_params(user_id: int, request_data: RequestSubmit) -> tuple:
+    """Paramètres de queries.INSERT_REQUEST (drapeaux en 0/1)"""
+    return (user_id, request_data.all_name, request_data.matricule,
+            request_data.cycle, request_data.level, request_data.nom_code_ue,
+            1 if request_data.note_exam else 0,
+            1 if request_data.note_cc else 0,
+            1 if request_data.note_tp else 0,
+            1 if request_data.note_tpe else 0,
+            1 if request_data.autre else 0,
+            request_data.comment,
+            1 if request_data.just_p else 0)
+
+
+@app.post("/submit-request", dependencies=[Depends(limit_submissions)])
 async def submit_request(request: Request, current_user: dict = Depends(get_current_user)):
     form_data = await request.form()
     
     try:
-        # Convertir les valeurs booléennes (les checkboxes retournent "on" si cochées)
-        note_exam = form_data.get("note_exam") == "on"
-        note_cc = form_data.get("note_cc") == "on"
-        note_tp = form_data.get("note_tp") == "on"
-        note_tpe = form_data.get("note_tpe") == "on"
-        autre = form_data.get("autre") == "on"
-        just_p = form_data.get("just_p") == "on"
-        
-        request_data = RequestSubmit(
-            all_name=f"{current_user['name']} {current_user['last_name']}",
-            matricule=current_user['matricule'],
-            cycle=form_data.get("cycle"),
-            level=int(form_data.get("level")),
-            nom_code_ue=form_data.get("nom_code_ue"),
-            note_exam=note_exam,
-            note_cc=note_cc,
-            note_tp=note_tp,
-            note_tpe=note_tpe,
-            autre=autre,
-            comment=form_data.get("comment"),
-            just_p=just_p
-        )
+        # Cases à cocher converties par pydantic ("true" ou "on" -> True, absentes -> False)
+        fields = bind_form(form_data, RequestSubmit)
+        # Nom et matricule viennent toujours de la session, jamais du formulaire
+        fields["all_name"] = f"{current_user['name']} {current_user['last_name']}"
+        fields["matricule"] = current_user['matricule']
+        request_data = RequestSubmit.model_validate(fields)
         
-        await execute_query(
-            """INSERT INTO requests 
-            (user_id, all_name, matricule, cycle, level, nom_code_ue, 
-             note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (current_user['user_id'], request_data.all_name, request_data.matricule,
-             request_data.cycle, request_data.level, request_data.nom_code_ue,
-             1 if request_data.note_exam else 0, 
-             1 if request_data.note_cc else 0,
-             1 if request_data.note_tp else 0,
-             1 if request_data.note_tpe else 0,
-             1 if request_data.autre else 0, 
-             request_data.comment,
-             1 if request_data.just_p else 0)
+        await execute_grouped(
+            queries.INSERT_REQUEST,
+            _insert_request_params(current_user['user_id'], request_data)
         )
+        await user_cache.invalidate(current_user['user_id'])
             
         return RedirectResponse(url="/my-requests", status_code=303)
         
+    except ValidationError as e:
+        return templates.TemplateResponse("submit_request.html", {
+            "request": request,
+            "user": current_user,
+            "error": format_validation_error(e)
+        })
+    except OVERLOAD_ERRORS as e:
+        # File d'écriture pleine ou base saturée : le client doit réessayer plus tard
+        return _busy_response(request, "submit_request.html", e, user=current_user)
     except Exception as e:
         return templates.TemplateResponse("submit_request.html", {
             "request": request,
@@ -237,6 +365,87 @@ async def submit_request(request: Request, current_user: dict = Depends(get_curr
 
 
 
+# Soumission groupée : plusieurs UE en une requête HTTP et une seule transaction
+BATCH_SUBMIT_MAX = int(os.environ.get("BATCH_SUBMIT_MAX", "20"))
+# Champs qu'un élément peut fournir (nom et matricule viennent toujours de la session)
+BATCH_ITEM_FIELDS = ("cycle", "level", "nom_code_ue", "note_exam", "note_cc", "note_tp",
+                     "note_tpe", "autre", "comment", "just_p")
+_BATCH_FORM_FIELD = re.compile(r"^items\[(\d+)\]\[(\w+)\]$")
+
+
+async def _read_batch(request: Request) -> tuple:
+    """Champs communs et éléments d'une soumission groupée (JSON ou formulaire).
+
+    JSON : ``{"cycle": ..., "level": ..., "items": [{"nom_code_ue": ..., "note_cc": true}, ...]}``
+    Formulaire : ``cycle``, ``level`` puis ``items[0][nom_code_ue]``, ``items[0][note_cc]``, ...
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        body = await request.json()
+        if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+            raise ValueError("Corps JSON attendu : {\"items\": [...]}")
+        return body, body["items"]
+
+    form_data = await request.form()
+    common, indexed = {}, {}
+    for key, value in form_data.multi_items():
+        match = _BATCH_FORM_FIELD.match(key)
+        if match:
+            indexed.setdefault(int(match.group(1)), {})[match.group(2)] = value
+        else:
+            common[key] = value
+    return common, [indexed[i] for i in sorted(indexed)]
+
+
+@app.post("/submit-requests", dependencies=[Depends(limit_submissions)])
+async def submit_requests(request: Request, current_user: dict = Depends(get_current_user)):
+    try:
+        common, items = await _read_batch(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail="Aucune requête à soumettre")
+    if len(items) > BATCH_SUBMIT_MAX:
+        raise HTTPException(status_code=413, detail=f"{BATCH_SUBMIT_MAX} requêtes au plus par envoi")
+    # Un jeton par élément : le premier a été pris par limit_submissions, avant la lecture du corps
+    if len(items) > 1:
+        await charge_submissions(request, current_user, len(items) - 1)
+
+    defaults = {k: common[k] for k in BATCH_ITEM_FIELDS if common.get(k) not in (None, "")}
+    results, params = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "error", "error": "objet attendu"})
+            continue
+        fields = dict(defaults)
+        fields.update({k: item[k] for k in BATCH_ITEM_FIELDS if item.get(k) not in (None, "")})
+        try:
+            request_data = RequestSubmit(
+                all_name=f"{current_user['name']} {current_user['last_name']}",
+                matricule=current_user['matricule'],
+                **fields
+            )
+        except ValidationError as e:
+            results.append({"index": index, "status": "error", "error": format_validation_error(e)})
+            continue
+        params.append(_insert_request_params(current_user['user_id'], request_data))
+        results.append({"index": index, "status": "created", "nom_code_ue": request_data.nom_code_ue})
+
+    # Tous les éléments valides en une transaction : un seul commit
+    if params:
+        try:
+            await execute_many(queries.INSERT_REQUEST, params)
+        except OVERLOAD_ERRORS:
+            raise
+        except Exception as e:
+            return JSONResponse(status_code=500, content={"status": "error", "error": str(e)})
+        await user_cache.invalidate(current_user['user_id'])
+
+    return JSONResponse(
+        status_code=200 if params else 422,
+        content={"created": len(params), "rejected": len(items) - len(params), "results": results}
+    )
+
+
 """
 @app.get("/my-requests", response_class=HTMLResponse)
 async def my_requests(request: Request, current_user: dict = Depends(get_current_user)):
@@ -311,31 +520,28 @@ async def my_requests(request: Request):
 
 
 @app.get("/my-requests", response_class=HTMLResponse)
-async def my_requests(request: Request, current_user: dict = Depends(get_current_user)):
+async def my_requests(request: Request,
+                      cursor: Optional[str] = None,
+                      page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                      current_user: dict = Depends(get_current_user)):
+    page = Page(page_size, cursor)
     try:
-        # Récupérer toutes les requêtes de l'utilisateur
-        rows = await fetch_all(
-            """
-            SELECT request_id, all_name, matricule, cycle, level, nom_code_ue,
-                   note_exam, note_cc, note_tp, note_tpe, autre, comment,
-                   just_p, created_at
-            FROM requests
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            """,
-            (current_user["user_id"],)
-        )
-
-        # Afficher la page HTML
-        return templates.TemplateResponse(
-            "my-requests.html",
-            {
-                "request": request,
-                "user": current_user,
-                "requests": rows
-            }
-        )
-    
+        # Une page de requêtes (+1 ligne pour savoir s'il en reste), via l'index (user_id, created_at)
+        if cursor:
+            created_at, request_id = decode_cursor(cursor)
+            query = queries.USER_REQUESTS_PAGE_AFTER
+            params = (current_user["user_id"], created_at, request_id, page_size + 1)
+        else:
+            query = queries.USER_REQUESTS_PAGE
+            params = (current_user["user_id"], page_size + 1)
+        version, rows = await user_cache.lookup(current_user["user_id"], cursor, page_size)
+        if rows is None:
+            # Page bornée : lue d'un coup, la connexion est rendue avant le rendu en flux
+            rows = await fetch_all(query, params)
+            await user_cache.store_page(current_user["user_id"], version, cursor, page_size, rows)
+        await page.open(user_cache.replay(rows))
+    except OVERLOAD_ERRORS as e:
+        return _busy_response(request, "my-requests.html", e, user=current_user, requests=[])
     except Exception as e:
         # Affiche l’erreur sur la page
         return templates.TemplateResponse(
@@ -348,6 +554,17 @@ async def my_requests(request: Request, current_user: dict = Depends(get_current
             }
         )
 
+    # Afficher la page HTML en flux (rendu seulement, la base n'est plus sollicitée)
+    return StreamingResponse(
+        stream_template("my-requests.html", {
+            "request": request,
+            "user": current_user,
+            "requests": page.rows(),
+            "page": page
+        }),
+        media_type="text/html"
+    )
+
 
 
 
@@ -384,7 +601,9 @@ async def my_requests(request: Request):
 """
 
 @app.get("/logout")
-async def logout():
+async def logout(user_data: str = Cookie(None, alias="user_data")):
+    if user_data:
+        session_cache.pop(user_data)
     response = RedirectResponse(url="/", status_code=303)
     response.delete_cookie("user_data")
     return response
@@ -392,32 +611,123 @@ async def logout():
 # Route de test pour la base de données
 @app.get("/test-db")
 async def test_db():
-    try:
-        result = await fetch_one("SELECT sqlite_version() as version")
-        return {"status": "success", "database_version": result['version']}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    result = await test_connection()
+    if result["status"] != "success":
+        return result
+    return {"status": "success", "database_version": result['version']}
 
 # Route pour vérifier l'état de la base de données
 @app.get("/db-status")
 async def db_status():
     try:
-        # Vérifier si les tables existent
-        users_count = await fetch_one("SELECT COUNT(*) as count FROM users")
-        requests_count = await fetch_one("SELECT COUNT(*) as count FROM requests")
+        # Compteurs tenus à jour par triggers : pas de COUNT(*) sur les tables
+        totals = {row['dimension']: row['count'] for row in await fetch_all(queries.STATS_TOTALS)}
         
         return {
             "status": "success",
             "database_path": get_db_path(),
-            "users_table": users_count['count'] if users_count else 0,
-            "requests_table": requests_count['count'] if requests_count else 0
+            "users_table": totals.get('users', 0),
+            "requests_table": totals.get('total', 0),
+            "concurrency": get_db_stats(),
+            "session_cache": session_cache.stats(),
+            "my_requests_cache": user_cache.stats(),
+            "password_service": password_service.stats(),
+            "rate_limit": limiter.stats()
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métriques au format texte de Prometheus (routes, requêtes SQL, files d'attente)"""
+    metrics.publish_stats("database", get_db_stats())
+    metrics.publish_stats("session_cache", session_cache.stats())
+    metrics.publish_stats("my_requests_cache", user_cache.stats())
+    metrics.publish_stats("password_service", password_service.stats())
+    metrics.publish_stats("rate_limit", limiter.stats())
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def stats():
+    """Requêtes par UE, cycle/niveau, type de note, jour et statut (agrégats uniquement)"""
+    summary = {"total": 0, "users": 0}
+    for row in await fetch_all(queries.STATS_SUMMARY):
+        if row['dimension'] in ("total", "users"):
+            summary[row['dimension']] = row['count']
+        else:
+            summary.setdefault(row['dimension'], {})[row['value']] = row['count']
+    # UE et cycles les plus demandés d'abord ; jours dans l'ordre chronologique
+    for dimension in ("ue", "cycle_level", "note", "status"):
+        if dimension in summary:
+            summary[dimension] = dict(sorted(summary[dimension].items(), key=lambda item: -item[1]))
+    return summary
+
+
+@app.get("/template-stats")
+async def template_stats():
+    return render_report()
+
+
 @app.get("/debug-requests-columns")
 async def debug_columns():
     rows = await fetch_all("PRAGMA table_info(requests)")
     return rows
+
+
+# Import / export en masse (corps et réponse en flux, voir bulk.py)
+@app.post("/admin/import", dependencies=[Depends(require_admin)])
+async def import_requests(request: Request, format: str = Query("jsonl"),
+                          batch_size: int = Query(bulk.BATCH_SIZE, ge=1, le=10000)):
+    if format not in bulk.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format inconnu : {format}")
+    lines = bulk.decode_lines(request.stream())
+    report = await bulk.import_records(bulk.records_for(format, lines), batch_size)
+    return report.as_dict()
+
+
+@app.get("/admin/export", dependencies=[Depends(require_admin)])
+async def export_requests(format: str = Query("jsonl"),
+                          since: Optional[str] = None, until: Optional[str] = None):
+    if format not in bulk.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format inconnu : {format}")
+    try:
+        bulk.export_period(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        bulk.export_rows(format, since, until),
+        media_type=bulk.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="requests.{format}"'}
+    )
+
+
+# File de traitement (voir processing.py)
+@app.post("/admin/requests/claim", dependencies=[Depends(require_admin)])
+async def claim_requests(body: ClaimRequest):
+    rows = await processing.claim(body.assignee, body.limit)
+    return {"claimed": len(rows), "requests": rows}
+
+
+@app.post("/admin/requests/status", dependencies=[Depends(require_admin)])
+async def update_requests_status(body: StatusUpdate):
+    updated = await processing.update_status(body.request_ids, body.status, body.assignee)
+    missing = sorted(set(body.request_ids) - set(updated))
+    return {"updated": len(updated), "request_ids": updated, "not_found": missing}
+
+
+# Recherche plein texte pour le personnel (voir search.py)
+@app.get("/admin/search", dependencies=[Depends(require_admin)])
+async def search_requests(q: str = Query(..., min_length=1, max_length=200),
+                          page: int = Query(1, ge=1),
+                          page_size: int = Query(search.DEFAULT_PAGE_SIZE, ge=1, le=search.MAX_PAGE_SIZE)):
+    results, has_next = await search.search(q, page, page_size)
+    return {
+        "query": q,
+        "page": page,
+        "page_size": page_size,
+        "results": results,
+        "next_page": page + 1 if has_next else None,
+    }
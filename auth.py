@@ -57,18 +57,257 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     plain_password = _truncate_to_72_bytes(plain_password)
     return pwd_context.verify(plain_password, hashed_password)"""
 
-from passlib.context import CryptContext
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import TimingStats
+
+# Coût Argon2 réglable par déploiement (voir `python auth.py calibrate`).
+# Un paramètre non défini garde la valeur par défaut de passlib.
+ARGON2_PARAMS = {
+    name: int(os.environ[env])
+    for name, env in (
+        ("time_cost", "ARGON2_TIME_COST"),
+        ("memory_cost", "ARGON2_MEMORY_COST"),
+        ("parallelism", "ARGON2_PARALLELISM"),
+    )
+    if os.environ.get(env)
+}
+
+_pwd_context = None
+
+
+def get_pwd_context():
+    """Contexte passlib, créé au premier usage (passlib/argon2 ralentissent le démarrage)."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        # Utilise argon2 au lieu de bcrypt (stable sur Vercel)
+        _pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            **{f"argon2__{name}": value for name, value in ARGON2_PARAMS.items()}
+        )
+    return _pwd_context
+
+
+def __getattr__(name):
+    # Compatibilité : auth.pwd_context reste accessible
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Utilise argon2 au lieu de bcrypt (stable sur Vercel)
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto"
-)
 
 def hash_password(password: str) -> str:
     """Hash sécurisé avec Argon2 (pas de limite 72 bytes, compatible Vercel)."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifie un mot de passe via Argon2."""
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Vrai si le hash a été calculé avec d'autres paramètres que le profil courant."""
+    return get_pwd_context().needs_update(hashed_password)
+
+
+# Service de hachage asynchrone : Argon2 hors de la boucle d'événements
+# "process" contourne le GIL ; "thread" sert de repli là où le multiprocessing
+# n'est pas disponible (fonctions serverless comme Vercel)
+PASSWORD_EXECUTOR = os.environ.get("PASSWORD_EXECUTOR", "thread" if "VERCEL" in os.environ else "process")
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_MAX_PENDING = int(os.environ.get("PASSWORD_MAX_PENDING", str(PASSWORD_WORKERS * 4)))
+PASSWORD_RETRY_AFTER = int(os.environ.get("PASSWORD_RETRY_AFTER", "1"))
+
+
+class PasswordServiceBusy(Exception):
+    """Trop de hachages en cours : la requête doit être retentée plus tard"""
+
+    def __init__(self, retry_after=PASSWORD_RETRY_AFTER):
+        super().__init__("Service momentanément surchargé, veuillez réessayer")
+        self.retry_after = retry_after
+
+
+def _timed(fn, *args):
+    # Exécuté dans le worker : time.monotonic() est commun à tous les processus
+    started = time.monotonic()
+    result = fn(*args)
+    return started, time.monotonic() - started, result
+
+
+def _timed_hash(password):
+    return _timed(hash_password, password)
+
+
+def _timed_verify(plain_password, hashed_password):
+    return _timed(verify_password, plain_password, hashed_password)
+
+
+class PasswordService:
+    """Hachage/vérification Argon2 dans un pool dédié, avec limite de concurrence.
+
+    Au-delà de ``max_pending`` opérations en cours ou en attente, les appels
+    sont refusés immédiatement avec PasswordServiceBusy plutôt que d'allonger
+    la file. Si un processus du pool meurt (mémoire épuisée, kill), le pool
+    cassé est remplacé et l'opération retentée une fois.
+    """
+
+    def __init__(self, workers=PASSWORD_WORKERS, max_pending=PASSWORD_MAX_PENDING,
+                 kind=PASSWORD_EXECUTOR):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self.pending = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.queue_wait = TimingStats()
+        self.hash_time = TimingStats()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._pid = os.getpid()
+            if self.kind == "process":
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                    return self._executor
+                except (OSError, NotImplementedError):
+                    self.kind = "thread"
+            # argon2-cffi relâche le GIL pendant le calcul : les threads restent parallèles
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordServiceBusy()
+        self.pending += 1
+        submitted = time.monotonic()
+        try:
+            try:
+                started, elapsed, result = await self._submit(fn, *args)
+            except BrokenProcessPool:
+                # Hachage et vérification sont sans effet de bord : on peut les relancer
+                try:
+                    started, elapsed, result = await self._submit(fn, *args)
+                except BrokenProcessPool:
+                    raise PasswordServiceBusy() from None
+        finally:
+            self.pending -= 1
+        self.queue_wait.record(max(0.0, started - submitted))
+        self.hash_time.record(elapsed)
+        return result
+
+    async def _submit(self, fn, *args):
+        executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # Pool inutilisable après la mort d'un worker : le prochain appel en crée un neuf
+            # (sauf si un appel concurrent l'a déjà remplacé)
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def hash(self, password):
+        return await self._run(_timed_hash, password)
+
+    async def verify(self, plain_password, hashed_password):
+        return await self._run(_timed_verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def stats(self):
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "queue_wait": self.queue_wait.snapshot(),
+            "hash_time": self.hash_time.snapshot(),
+        }
+
+
+password_service = PasswordService()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash Argon2 calculé hors de la boucle d'événements."""
+    return await password_service.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Vérification Argon2 effectuée hors de la boucle d'événements."""
+    return await password_service.verify(plain_password, hashed_password)
+
+
+def calibrate(target_ms, parallelism=1, max_memory_kib=262144, samples=3):
+    """Chercher le profil Argon2 le plus coûteux qui reste sous ``target_ms`` sur cette machine.
+
+    On privilégie la mémoire (plus coûteuse pour un attaquant) avec au moins
+    deux passes, puis on augmente le nombre de passes tant que la cible tient.
+    """
+    from passlib.hash import argon2
+
+    def measure(time_cost, memory_cost):
+        hasher = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+        best = float("inf")
+        for _ in range(samples):
+            start = time.perf_counter()
+            hasher.hash("calibration-password")
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    memory_cost = 8192
+    while memory_cost * 2 <= max_memory_kib and measure(2, memory_cost * 2) <= target_ms:
+        memory_cost *= 2
+    time_cost = 2
+    elapsed = measure(time_cost, memory_cost)
+    while time_cost < 16:
+        candidate = measure(time_cost + 1, memory_cost)
+        if candidate > target_ms:
+            break
+        time_cost += 1
+        elapsed = candidate
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "measured_ms": round(elapsed, 1),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Outils Argon2")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="proposer des paramètres pour une latence cible")
+    cal.add_argument("--target-ms", type=float, default=250)
+    cal.add_argument("--parallelism", type=int, default=1)
+    cal.add_argument("--max-memory-kib", type=int, default=262144)
+    args = parser.parse_args()
+
+    profile = calibrate(args.target_ms, args.parallelism, args.max_memory_kib)
+    print(f"# {profile['measured_ms']} ms par hash sur cette machine (cible {args.target_ms} ms)")
+    print(f"ARGON2_TIME_COST={profile['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={profile['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={profile['parallelism']}")
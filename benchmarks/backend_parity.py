@@ -0,0 +1,141 @@
+"""Parité SQLite / PostgreSQL : même scénario, mêmes résultats, temps comparés.
+
+Le scénario (inscription, soumissions, lectures) est joué sur une base SQLite
+temporaire puis, si DATABASE_URL est défini, sur PostgreSQL via asyncpg.
+Chaque backend est comparé colonne à colonne (hors identifiants et dates) au
+résultat attendu ; le script sort en erreur à la moindre différence. Sans
+DATABASE_URL, PostgreSQL est signalé comme ignoré.
+
+Le même contrôle est exécuté par pytest (tests/test_backend_parity.py).
+
+Usage : DATABASE_URL=postgresql://... python benchmarks/backend_parity.py [--requests 200]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+VOLATILE = {"user_id", "request_id", "created_at"}
+# Colonnes comparées (pas de SELECT * : la colonne de recherche n'existe que sous PostgreSQL)
+REQUEST_COLUMNS = ("request_id, user_id, all_name, matricule, cycle, level, nom_code_ue, note_exam, note_cc, "
+                   "note_tp, note_tpe, autre, comment, just_p, created_at, status")
+
+
+async def scenario(n_requests):
+    from database import execute_query, fetch_one, fetch_all, get_backend
+
+    await get_backend().init_schema()
+    await execute_query("DELETE FROM requests")
+    await execute_query("DELETE FROM users")
+
+    start = time.perf_counter()
+    user_id = await execute_query(
+        "INSERT INTO users (matricule, name, last_name, email, phone, password) VALUES (?, ?, ?, ?, ?, ?)",
+        ("PARITY01", "Jean", "Dupont", "parity@example.com", "690000000", "x")
+    )
+    ids = []
+    for i in range(n_requests):
+        ids.append(await execute_query(
+            """INSERT INTO requests
+            (user_id, all_name, matricule, cycle, level, nom_code_ue,
+             note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (user_id, "Jean Dupont", "PARITY01", "Licence", i % 5, f"INF{i:03d}",
+             i % 2, 0, 1, 0, 0, "Commentaire avec un ? littéral", 0)
+        ))
+    user = await fetch_one(
+        "SELECT user_id, matricule, name, last_name, email FROM users WHERE email = ? OR matricule = ?",
+        ("PARITY01", "PARITY01")
+    )
+    rows = await fetch_all(
+        f"SELECT {REQUEST_COLUMNS} FROM requests WHERE user_id = ? ORDER BY request_id", (user_id,)
+    )
+    missing = await fetch_one("SELECT user_id FROM users WHERE email = ?", ("absent",))
+    elapsed = time.perf_counter() - start
+
+    assert len(set(ids)) == n_requests and all(ids), "lastrowid doit être unique et non nul"
+    strip = lambda r: {k: v for k, v in r.items() if k not in VOLATILE}
+    return {
+        "user": strip(user),
+        "requests": [strip(r) for r in rows],
+        "missing": missing,
+    }, elapsed
+
+
+def expected(n_requests):
+    """Résultat attendu du scénario, identique pour tous les backends"""
+    return {
+        "user": {"matricule": "PARITY01", "name": "Jean", "last_name": "Dupont", "email": "parity@example.com"},
+        "requests": [
+            {"all_name": "Jean Dupont", "matricule": "PARITY01", "cycle": "Licence", "level": i % 5,
+             "nom_code_ue": f"INF{i:03d}", "note_exam": i % 2, "note_cc": 0, "note_tp": 1, "note_tpe": 0,
+             "autre": 0, "comment": "Commentaire avec un ? littéral", "just_p": 0, "status": "pending"}
+            for i in range(n_requests)
+        ],
+        "missing": None,
+    }
+
+
+def mismatches(result, n_requests):
+    """Différences entre un résultat et l'attendu, une ligne par écart"""
+    reference = expected(n_requests)
+    found = []
+    for key in ("user", "missing"):
+        if result[key] != reference[key]:
+            found.append(f"{key} : {result[key]!r} au lieu de {reference[key]!r}")
+    if len(result["requests"]) != n_requests:
+        found.append(f"{len(result['requests'])} requêtes au lieu de {n_requests}")
+    for i, (row, ref) in enumerate(zip(result["requests"], reference["requests"])):
+        if row != ref:
+            found.append(f"requête {i} : {row!r} au lieu de {ref!r}")
+    return found
+
+
+def run_backend(backend, n_requests):
+    """Jouer le scénario dans un sous-processus (la config est lue à l'import)"""
+    env = dict(os.environ, DB_BACKEND=backend)
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault("DB_PATH", os.path.join(tmp, "parity.db"))
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--requests", str(n_requests)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result, elapsed = asyncio.run(scenario(args.requests))
+        print(json.dumps({"result": result, "elapsed": elapsed}))
+        return
+
+    backends = ["sqlite"] + (["postgres"] if os.environ.get("DATABASE_URL") else [])
+    failed = False
+    for name in backends:
+        run = run_backend(name, args.requests)
+        found = mismatches(run["result"], args.requests)
+        print(f"{name:>10} : {run['elapsed'] * 1000:8.1f} ms, {'OK' if not found else f'{len(found)} écarts'}")
+        for line in found[:20]:
+            print(f"    {line}")
+        failed = failed or bool(found)
+    if "postgres" not in backends:
+        print("  postgres : IGNORÉ (DATABASE_URL non défini), parité non vérifiée", file=sys.stderr)
+    if failed:
+        print("ÉCHEC : résultats différents de l'attendu")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark de la file de traitement : agents concurrents sur une grosse table `requests`.
+
+La table est remplie de --rows requêtes, dont --pending en attente (le reste
+déjà traité). --workers processus prennent en charge --batch requêtes à la
+fois puis les marquent traitées, jusqu'à vider la file. Le script vérifie
+qu'aucune requête n'a été prise deux fois et donne la latence de `claim`.
+
+Usage : python benchmarks/claim_queue.py [--rows 200000] [--pending 5000] [--workers 4] [--batch 20]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(path, rows, pending):
+    import database
+
+    database.init_db()
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO users (matricule, name, last_name, email, phone, password) "
+        "VALUES ('M000001', 'Jean', 'Dupont', 'jean@example.org', '600000000', 'x')"
+    )
+    conn.executemany(
+        "INSERT INTO requests (user_id, all_name, matricule, cycle, level, nom_code_ue, "
+        "created_at, status, processed_at) VALUES (1, 'Jean Dupont', 'M000001', 'Licence', 2, ?, ?, ?, ?)",
+        (
+            (f"INF{i % 40:03d}", f"2025-{1 + i % 12:02d}-01 10:00:00",
+             "pending" if i >= rows - pending else "done",
+             None if i >= rows - pending else "2025-12-31 10:00:00")
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _work(name, batch):
+    import processing
+
+    claimed, latencies = [], []
+    while True:
+        start = time.perf_counter()
+        rows = await processing.claim(name, batch)
+        latencies.append(time.perf_counter() - start)
+        if not rows:
+            return claimed, latencies
+        ids = [row["request_id"] for row in rows]
+        await processing.update_status(ids, "done")
+        claimed.extend(ids)
+
+
+def worker(args):
+    path, name, batch = args
+    os.environ["DB_PATH"] = path
+    return asyncio.run(_work(name, batch))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--pending", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        os.environ["DB_PATH"] = path
+        start = time.perf_counter()
+        seed(path, args.rows, args.pending)
+        print(f"{args.rows} requêtes dont {args.pending} en attente ({time.perf_counter() - start:.1f} s)")
+
+        ctx = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        with ctx.Pool(args.workers) as pool:
+            results = pool.map(worker, [(path, f"agent-{i}", args.batch) for i in range(args.workers)])
+        elapsed = time.perf_counter() - start
+
+    claimed = [rid for ids, _ in results for rid in ids]
+    latencies = sorted(ms * 1000 for _, lat in results for ms in lat)
+    duplicates = len(claimed) - len(set(claimed))
+    print(f"{len(claimed)} requêtes traitées en {elapsed:.2f} s "
+          f"({len(claimed) / elapsed:.0f}/s, {args.workers} agents)")
+    print(f"  par agent : {[len(ids) for ids, _ in results]}")
+    print(f"  claim : p50 {statistics.median(latencies):.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms")
+    print(f"  doublons : {duplicates}")
+    if duplicates or len(claimed) != args.pending:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark du group commit : INSERT/s dans `requests` avec et sans regroupement.
+
+Usage : python benchmarks/group_commit.py [--rows 2000] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INSERT_REQUEST = """INSERT INTO requests
+    (user_id, all_name, matricule, cycle, level, nom_code_ue,
+     note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+async def run(database, rows, concurrency):
+    await database.init_schema()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(i):
+        async with semaphore:
+            return await database.execute_grouped(
+                INSERT_REQUEST,
+                (i % 500 + 1, "Jean Dupont", f"M{i:06d}", "Licence", 2,
+                 f"INF{i % 40:03d}", 1, 0, 0, 0, 0, "Bench", 0)
+            )
+
+    start = time.perf_counter()
+    ids = await asyncio.gather(*(submit(i) for i in range(rows)))
+    elapsed = time.perf_counter() - start
+    assert len(set(ids)) == rows, "chaque appel doit recevoir son propre lastrowid"
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["DB_CONCURRENCY"] = "wal"
+        import database
+
+        for enabled in (False, True):
+            database.DB_GROUP_COMMIT = enabled
+            rate = asyncio.run(run(database, args.rows, args.concurrency))
+            label = "avec group commit" if enabled else "sans group commit"
+            print(f"{label:>20} : {rate:10.0f} INSERT/s")
+        print("writer :", database.get_writer().stats()["group_commit"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Test de charge du parcours complet : inscription → connexion → tableau de bord → soumission → mes requêtes.
+
+L'application est pilotée en mémoire (transport ASGI de httpx) et/ou via
+uvicorn, sur une base SQLite temporaire préremplie de --seed-users
+utilisateurs et --seed-requests requêtes. --users utilisateurs virtuels
+déroulent le parcours en parallèle (au plus --concurrency requêtes HTTP en
+cours), puis répètent --iterations fois tableau de bord → soumission → mes
+requêtes.
+
+Le rapport JSON donne, par mode et par route, le nombre d'appels, les
+erreurs, les refus temporaires (503, rejoués après Retry-After), les latences p50/p95/p99 (ms) et le débit (requêtes/s). Avec
+--baseline, le script échoue si un p95 dépasse la référence de plus de
+--tolerance %, ou si un débit passe sous la référence d'autant.
+
+Tous les utilisateurs virtuels partagent une adresse IP : la limitation de
+débit est désactivée sauf si RATE_LIMIT_ENABLED est fixée explicitement.
+
+Usage : python benchmarks/lifecycle.py [--mode asgi|uvicorn|both] [--users 50] [--iterations 5]
+        [--concurrency 20] [--seed-users 1000] [--seed-requests 50000] [--json out.json]
+        [--baseline ref.json] [--tolerance 20]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sans cela, les limites par IP de ratelimit.py refusent l'essentiel du parcours
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+# Réponses 503 + Retry-After (hachage saturé) : nouvel essai, comme un utilisateur qui renvoie le formulaire
+MAX_RETRIES = 5
+
+
+# ---------- Données ----------
+
+def seed(path, users, requests):
+    """Base temporaire avec schéma, migrations et données de départ"""
+    os.environ["DB_PATH"] = path
+    import database
+    from auth import hash_password
+
+    database.init_db()
+    password = hash_password("bench-password")
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (matricule, name, last_name, email, phone, password) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"S{i:07d}", "Jean", "Dupont", f"s{i}@example.org", "600000000", password) for i in range(users)),
+    )
+    conn.executemany(
+        "INSERT INTO requests (user_id, all_name, matricule, cycle, level, nom_code_ue, note_cc, comment, "
+        "created_at) VALUES (?, 'Jean Dupont', ?, 'Licence', 2, ?, 1, 'Relevé à vérifier', ?)",
+        (
+            (i % users + 1, f"S{i % users:07d}", f"INF-{100 + i % 60} Algorithmique",
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00")
+            for i in range(requests if users else 0)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+# ---------- Parcours ----------
+
+class Recorder:
+    """Latences par route ; les 503 suivis d'un nouvel essai sont comptés à part"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client, semaphore, name, method, url, expected, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            retry_after = None
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                    status = str(response.status_code)
+                    retry_after = response.headers.get("retry-after")
+                except Exception as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - start
+            if status == "503" and retry_after and attempt < MAX_RETRIES:
+                self.throttled[name] += 1
+                await asyncio.sleep(float(retry_after))
+                continue
+            break
+        self.latencies[name].append(elapsed)
+        ok = status in expected
+        if not ok:
+            self.errors[name] += 1
+            self.statuses[name][status] += 1
+        return ok
+
+
+async def virtual_user(client, recorder, semaphore, index, iterations, run_id):
+    matricule = f"V{run_id}{index:05d}"
+    account = {
+        "matricule": matricule, "name": "Marie", "last_name": "Curie",
+        "email": f"{matricule.lower()}@example.org", "phone": "600000000", "password": "bench-password",
+    }
+    call = recorder.call
+    await call(client, semaphore, "POST /register", "POST", "/register", {"303"}, data=account)
+    if not await call(client, semaphore, "POST /login", "POST", "/login", {"303"},
+                      data={"login": matricule, "password": account["password"]}):
+        return
+    for i in range(iterations):
+        await call(client, semaphore, "GET /dashboard", "GET", "/dashboard", {"200"})
+        await call(client, semaphore, "POST /submit-request", "POST", "/submit-request", {"303"}, data={
+            "cycle": "Licence", "level": "2", "nom_code_ue": f"INF-{100 + i % 60} Algorithmique",
+            "note_cc": "true", "comment": "Note de contrôle continu absente",
+        })
+        await call(client, semaphore, "GET /my-requests", "GET", "/my-requests", {"200"})
+
+
+async def drive(make_client, args, run_id):
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+
+    async def one(index):
+        async with make_client() as client:
+            await virtual_user(client, recorder, semaphore, index, args.iterations, run_id)
+
+    await asyncio.gather(*(one(i) for i in range(args.users)))
+    return recorder, time.perf_counter() - start
+
+
+def percentile(sorted_values, p):
+    """Percentile au rang le plus proche"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        routes[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "error_statuses": dict(recorder.statuses.get(name, {})),
+            "throttled": recorder.throttled.get(name, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "throughput_rps": round(len(values) / elapsed, 1),
+        }
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(r["errors"] for r in routes.values()),
+        "throughput_rps": round(total / elapsed, 1),
+        "routes": routes,
+    }
+
+
+# ---------- Modes ----------
+
+async def run_asgi(args):
+    import httpx
+    from app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        recorder, elapsed = await drive(
+            lambda: httpx.AsyncClient(transport=transport, base_url="http://bench"), args, "A"
+        )
+    return summarize(recorder, elapsed)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(args, db_path):
+    import httpx
+
+    port = _free_port()
+    env = dict(os.environ, DB_PATH=db_path)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as probe:
+            for _ in range(100):
+                try:
+                    await probe.get("/test-db")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn n'a pas démarré")
+        limits = httpx.Limits(max_connections=args.concurrency)
+        recorder, elapsed = await drive(
+            lambda: httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60), args, "U"
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return summarize(recorder, elapsed)
+
+
+# ---------- Comparaison ----------
+
+def regressions(report, baseline, tolerance):
+    """Écarts au-delà de la tolérance, par mode et par route"""
+    factor = 1 + tolerance / 100
+    found = []
+    for mode, result in report["modes"].items():
+        reference = baseline.get("modes", {}).get(mode)
+        if not reference:
+            continue
+        for name, route in result["routes"].items():
+            ref = reference["routes"].get(name)
+            if not ref:
+                continue
+            if route["p95_ms"] > ref["p95_ms"] * factor:
+                found.append(f"{mode} {name} : p95 {route['p95_ms']} ms > {ref['p95_ms']} ms")
+            if route["throughput_rps"] < ref["throughput_rps"] / factor:
+                found.append(f"{mode} {name} : {route['throughput_rps']} req/s < {ref['throughput_rps']} req/s")
+            if route["errors"] > ref["errors"]:
+                found.append(f"{mode} {name} : {route['errors']} erreurs > {ref['errors']}")
+    return found
+
+
+def print_report(report):
+    for mode, result in report["modes"].items():
+        print(f"[{mode}] {result['requests']} requêtes en {result['elapsed_s']} s "
+              f"({result['throughput_rps']} req/s, {result['errors']} erreurs)")
+        print(f"  {'route':<22} {'n':>6} {'err':>4} {'503':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+        for name, r in result["routes"].items():
+            print(f"  {name:<22} {r['count']:6d} {r['errors']:4d} {r['throttled']:4d} {r['p50_ms']:8.1f} "
+                  f"{r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['throughput_rps']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("asgi", "uvicorn", "both"), default="asgi")
+    parser.add_argument("--users", type=int, default=50, help="utilisateurs virtuels")
+    parser.add_argument("--iterations", type=int, default=5, help="cycles soumission / consultation par utilisateur")
+    parser.add_argument("--concurrency", type=int, default=20, help="requêtes HTTP simultanées au plus")
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--seed-requests", type=int, default=50_000)
+    parser.add_argument("--json", help="écrire le rapport JSON dans ce fichier")
+    parser.add_argument("--baseline", help="rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="régression tolérée en %%")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.seed_users, args.seed_requests)
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+            "modes": {},
+        }
+        if args.mode in ("asgi", "both"):
+            report["modes"]["asgi"] = asyncio.run(run_asgi(args))
+        if args.mode in ("uvicorn", "both"):
+            report["modes"]["uvicorn"] = asyncio.run(run_uvicorn(args, db_path))
+
+        from auth import password_service
+        password_service.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"RÉGRESSION : {line}")
+        if found:
+            sys.exit(1)
+        print(f"OK : aucune régression au-delà de {args.tolerance} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark de montée en charge : débit de serve.py selon le nombre de workers.
+
+Pour chaque valeur de --workers, serve.py est lancé sur la même base
+(préremplie comme pour benchmarks/lifecycle.py), --sessions comptes s'y
+connectent, puis --clients processus de charge envoient des requêtes
+pendant --duration secondes (au plus --concurrency en cours chacun) :
+tableau de bord, mes requêtes, et une part --write-ratio de soumissions.
+
+Le rapport donne, par nombre de workers, le débit, l'accélération par
+rapport au premier, les latences p50/p95 (ms) et les erreurs. L'accélération
+est bornée par le nombre de cœurs, que les clients de charge partagent avec
+le serveur.
+
+Usage : python benchmarks/scaling.py [--workers 1,2,4] [--duration 10] [--clients 2]
+        [--concurrency 32] [--write-ratio 0.1] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lifecycle import _free_port, percentile, seed
+
+# Comptes créés par lifecycle.seed
+PASSWORD = "bench-password"
+
+
+async def _load(base_url, cookies, duration, concurrency, write_ratio, index):
+    import httpx
+
+    rng = random.Random(index)
+    latencies, errors = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(client):
+        while time.perf_counter() < deadline:
+            headers = {"Cookie": f"user_data={rng.choice(cookies)}"}
+            roll = rng.random()
+            if roll < write_ratio:
+                method, url, expected = "POST", "/submit-request", 303
+                data = {"cycle": "Licence", "level": "2", "nom_code_ue": f"INF-{rng.randint(100, 160)} Algorithmique",
+                        "note_cc": "true", "comment": "Note de contrôle continu absente"}
+            else:
+                method, url, expected, data = "GET", rng.choice(("/dashboard", "/my-requests")), 200, None
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=headers, data=data)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if status != expected:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(args):
+    return asyncio.run(_load(*args))
+
+
+async def _login(base_url, sessions):
+    import httpx
+
+    cookies = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for i in range(sessions):
+            response = await client.post("/login", data={"login": f"S{i:07d}", "password": PASSWORD})
+            if response.status_code != 303:
+                raise RuntimeError(f"Connexion refusée ({response.status_code}) pour S{i:07d}")
+            cookies.append(response.cookies["user_data"])
+    return cookies
+
+
+def _wait_ready(base_url, server):
+    import httpx
+
+    for _ in range(200):
+        if server.poll() is not None:
+            raise RuntimeError("serve.py s'est arrêté au démarrage")
+        try:
+            if httpx.get(f"{base_url}/test-db").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("serve.py n'a pas démarré")
+
+
+def run(workers, db_path, args):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, DB_PATH=db_path, RATE_LIMIT_ENABLED="0")
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        _wait_ready(base_url, server)
+        cookies = asyncio.run(_login(base_url, args.sessions))
+        ctx = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        with ctx.Pool(args.clients) as pool:
+            results = pool.map(load_process, [
+                (base_url, cookies, args.duration, args.concurrency, args.write_ratio, i)
+                for i in range(args.clients)
+            ])
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = sorted(value for values, _ in results for value in values)
+    errors = {}
+    for _, found in results:
+        for status, count in found.items():
+            errors[status] = errors.get(status, 0) + count
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default=",".join(sorted({"1", "2", str(os.cpu_count() or 1)}, key=int)),
+                        help="nombres de workers à comparer, séparés par des virgules")
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes de charge par configuration")
+    parser.add_argument("--clients", type=int, default=2, help="processus de charge")
+    parser.add_argument("--concurrency", type=int, default=32, help="requêtes simultanées par processus de charge")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="part de soumissions")
+    parser.add_argument("--sessions", type=int, default=50, help="comptes connectés")
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--seed-requests", type=int, default=50_000)
+    parser.add_argument("--json", help="écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, max(args.seed_users, args.sessions), args.seed_requests)
+        results = [run(int(n), db_path, args) for n in args.workers.split(",")]
+
+    base = results[0]["throughput_rps"] or 1
+    print(f"{'workers':>7} {'req/s':>9} {'x':>6} {'p50':>8} {'p95':>8} {'err':>6}  ({os.cpu_count()} cœurs)")
+    for r in results:
+        print(f"{r['workers']:7d} {r['throughput_rps']:9.1f} {r['throughput_rps'] / base:6.2f} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['errors']:6d}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark de la recherche : LIKE '%...%' contre l'index FTS5, sur une grosse table.
+
+La base est créée avec le schéma et les migrations de l'application, puis
+remplie de --rows requêtes (UE et commentaires synthétiques). Chaque
+recherche est répétée --repeat fois ; le rapport donne la médiane en ms
+pour LIKE, pour FTS5 sans classement et pour la requête de l'application
+(classée par bm25, dont le coût croît avec le nombre de résultats).
+
+Usage : python benchmarks/search.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Vocabulaire à la Zipf : quelques mots très fréquents, une longue traîne de mots rares
+VOCABULARY = ("note absente erreur relevé examen rattrapage contrôle continu travaux pratiques "
+              "justificatif présence maladie copie double correction barème session janvier "
+              "juin oubli saisie moyenne coefficient délibération").split() + [
+    f"terme{i:05d}" for i in range(20_000)
+]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+UES = [f"{dept}-{num} {name}" for dept, name in (
+    ("INF", "Informatique"), ("MAT", "Mathématiques"), ("PHY", "Physique"),
+    ("CHI", "Chimie"), ("ECO", "Économie"), ("LAN", "Langues"),
+) for num in range(100, 400, 7)]
+
+SEARCHES = [
+    # (libellé, motif LIKE, texte de recherche) ; fréquence décroissante
+    ("mot fréquent", "%examen%", "examen"),
+    ("mot moyen", "%terme00050%", "terme00050"),
+    ("mot rare", "%terme15000%", "terme15000"),
+    ("code d'UE", "%INF-247%", "INF 247"),
+    ("deux mots", "%copie%terme00020%", "copie terme00020"),
+]
+
+# Recherche sans classement : coût de l'index seul, comparable au LIKE
+FTS_UNRANKED = """
+    SELECT rowid FROM requests_fts WHERE requests_fts MATCH ? ORDER BY rowid LIMIT 20
+"""
+
+LIKE_QUERY = """
+    SELECT request_id, nom_code_ue, comment FROM requests
+    WHERE nom_code_ue LIKE ? OR comment LIKE ?
+    ORDER BY request_id LIMIT 20
+"""
+
+
+def seed(path, rows):
+    import database
+
+    database.init_db()
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO users (matricule, name, last_name, email, phone, password) "
+        "VALUES ('M000001', 'Jean', 'Dupont', 'jean@example.org', '600000000', 'x')"
+    )
+    conn.executemany(
+        "INSERT INTO requests (user_id, all_name, matricule, cycle, level, nom_code_ue, comment) "
+        "VALUES (1, 'Jean Dupont', 'M000001', 'Licence', 2, ?, ?)",
+        (
+            (rng.choice(UES), " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(5, 40))))
+            for _ in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        os.environ["DB_PATH"] = path
+        start = time.perf_counter()
+        seed(path, args.rows)
+        print(f"{args.rows} requêtes insérées en {time.perf_counter() - start:.1f} s")
+
+        import queries
+        import search
+
+        conn = sqlite3.connect(path)
+        print(f"{'recherche':<14} {'LIKE':>9} {'FTS5':>9} {'FTS5 classé':>12} {'résultats':>10}  (médianes en ms)")
+        for label, pattern, text in SEARCHES:
+            like_ms, _ = timed(lambda: conn.execute(LIKE_QUERY, (pattern, pattern)).fetchall(), args.repeat)
+            expression = search.match_expression(text)
+            fts_ms, _ = timed(lambda: conn.execute(FTS_UNRANKED, (expression,)).fetchall(), args.repeat)
+            ranked_ms, _ = timed(
+                lambda: conn.execute(queries.SEARCH_REQUESTS, (expression, 20, 0)).fetchall(), args.repeat
+            )
+            matches = conn.execute(
+                "SELECT COUNT(*) FROM requests_fts WHERE requests_fts MATCH ?", (expression,)
+            ).fetchone()[0]
+            print(f"{label:<14} {like_ms:9.1f} {fts_ms:9.2f} {ranked_ms:12.2f} {matches:10d}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
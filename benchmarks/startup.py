@@ -0,0 +1,83 @@
+"""Benchmark du démarrage à froid : temps d'import de `app` mesuré par `python -X importtime`.
+
+Chaque essai lance un interpréteur neuf. Le rapport donne la médiane du
+temps d'import total et les modules les plus coûteux ; avec --baseline, le
+script échoue si la médiane dépasse la référence de plus de --tolerance %.
+
+Usage : python benchmarks/startup.py [--runs 7] [--json out.json] [--baseline ref.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def import_times(module="app"):
+    """Temps cumulés (µs) par module pour un import à froid de ``module``"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_PATH=os.path.join(tmp, "startup.db"))
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+    times = {}
+    for match in LINE.finditer(out.stderr):
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        # Niveau 1 : modules importés directement par `module` (et `module` lui-même)
+        if depth <= 3:
+            times[name] = cumulative
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="écrire le rapport JSON dans ce fichier")
+    parser.add_argument("--baseline", help="rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="régression tolérée en %%")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    modules = set().union(*runs)
+    median = {name: statistics.median(r.get(name, 0) for r in runs) for name in modules}
+    total_ms = median.get(args.module, 0) / 1000
+    heaviest = sorted(
+        ((name, us / 1000) for name, us in median.items() if name != args.module),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms": round(total_ms, 2),
+        "heaviest": {name: round(ms, 2) for name, ms in heaviest},
+    }
+    print(f"import {args.module} : {total_ms:.1f} ms (médiane sur {args.runs} essais)")
+    for name, ms in heaviest:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            reference = json.load(f)["import_ms"]
+        limit = reference * (1 + args.tolerance / 100)
+        if total_ms > limit:
+            print(f"RÉGRESSION : {total_ms:.1f} ms > {limit:.1f} ms (référence {reference} ms)")
+            sys.exit(1)
+        print(f"OK : {total_ms:.1f} ms <= {limit:.1f} ms (référence {reference} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Microbenchmark de la validation des formulaires : validations par seconde.
+
+Mesure ``UserRegister`` (valide et invalide) et ``RequestSubmit`` construits
+comme dans app.py : formulaire Starlette -> ``bind_form`` -> ``model_validate``.
+Chaque cas est exécuté --number fois, --repeat séries ; le rapport donne la
+meilleure série en validations/s et en µs par validation.
+
+Usage : python benchmarks/validation.py [--number 20000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pydantic import ValidationError
+from starlette.datastructures import FormData
+
+from models import RequestSubmit, UserRegister, bind_form
+
+REGISTER_FORM = FormData([
+    ("matricule", "20L1234"), ("name", "Marie-Hélène"), ("last_name", "D'Arc"),
+    ("email", "marie@example.org"), ("phone", "612345678"), ("password", "correct horse battery"),
+])
+REGISTER_INVALID = FormData([
+    ("matricule", "20L1234"), ("name", "Marie 2"), ("last_name", "D'Arc"),
+    ("email", "marie@example.org"), ("phone", "61234"), ("password", "x"),
+])
+SUBMIT_FORM = FormData([
+    ("cycle", "Licence"), ("level", "2"), ("nom_code_ue", "INF-101 Algorithmique"),
+    ("note_exam", "true"), ("note_cc", "true"), ("comment", "Note de contrôle continu absente"),
+])
+SESSION = {"all_name": "Marie Curie", "matricule": "20L1234"}
+
+
+def register(form):
+    return UserRegister.model_validate(bind_form(form, UserRegister))
+
+
+def register_invalid(form):
+    try:
+        UserRegister.model_validate(bind_form(form, UserRegister))
+    except ValidationError:
+        return None
+    raise AssertionError("formulaire invalide accepté")
+
+
+def submit(form):
+    fields = bind_form(form, RequestSubmit)
+    fields.update(SESSION)
+    return RequestSubmit.model_validate(fields)
+
+
+CASES = [
+    ("UserRegister valide", register, REGISTER_FORM),
+    ("UserRegister invalide", register_invalid, REGISTER_INVALID),
+    ("RequestSubmit (formulaire)", submit, SUBMIT_FORM),
+]
+
+
+def bench(fn, arg, number, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Contrôle : les cases cochées ("true") deviennent True, les autres False
+    data = submit(SUBMIT_FORM)
+    assert data.note_exam and data.note_cc and not data.note_tp and data.level == 2
+
+    print(f"{'cas':<28} {'validations/s':>14} {'µs':>8}")
+    for label, fn, arg in CASES:
+        seconds = bench(fn, arg, args.number, args.repeat)
+        print(f"{label:<28} {1 / seconds:14,.0f} {seconds * 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# bulk.py - Import et export en masse des requêtes (JSONL / CSV)
+"""Import et export de la table ``requests`` en flux, dans les deux sens.
+
+- Import : chaque ligne (objet JSON ou ligne CSV) est validée par
+  ``RequestSubmit``, puis les lignes valides sont insérées par lots
+  (``executemany``, une transaction par lot). Les lignes refusées sont
+  rapportées avec leur numéro, sans interrompre l'import.
+- Export : les lignes sont lues par ``iter_rows`` et écrites au fil de
+  l'eau, sans charger la table en mémoire.
+
+L'utilisateur d'une requête importée est donné par ``user_id`` ou, à
+défaut, retrouvé par ``matricule``. ``created_at`` est conservé s'il est
+fourni (date ISO, ramenée à "YYYY-MM-DD HH:MM:SS" en UTC ; une date
+invalide refuse la ligne), sinon c'est la date de l'import.
+
+Usage :
+    python bulk.py import requetes.jsonl [--format csv] [--batch-size 1000]
+    python bulk.py export [--format csv] [--since 2025-09-01] [--until 2026-02-01] [-o sortie.jsonl]
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from pydantic import ValidationError
+
+import queries
+import user_cache
+from database import execute_many, fetch_one, iter_rows
+from models import RequestSubmit, format_validation_error
+
+FORMATS = ("jsonl", "csv")
+BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "1000"))
+# Au-delà, les erreurs sont seulement comptées
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_FIELDS = [
+    "request_id", "user_id", "all_name", "matricule", "cycle", "level", "nom_code_ue",
+    "note_exam", "note_cc", "note_tp", "note_tpe", "autre", "comment", "just_p", "created_at",
+    "status", "assignee", "processed_at",
+]
+
+MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+class ImportReport:
+    """Bilan d'un import : lignes insérées et erreurs par numéro de ligne"""
+
+    def __init__(self):
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.user_ids = set()
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {"imported": self.imported, "rejected": self.error_count, "errors": self.errors}
+
+
+# ---------- Lecture ----------
+
+async def decode_lines(chunks, encoding="utf-8"):
+    """Découper un flux d'octets (corps de requête, fichier) en lignes de texte"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def file_chunks(f, size=64 * 1024):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def jsonl_records(lines):
+    """``(numéro de ligne, objet ou None, erreur ou None)`` pour chaque ligne non vide"""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"JSON invalide : {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "objet JSON attendu"
+            continue
+        yield number, record, None
+
+
+async def csv_records(lines):
+    """Comme ``jsonl_records`` pour un CSV avec en-tête (champs entre guillemets sur plusieurs lignes acceptés)"""
+    header = None
+    number = start = 0
+    buffer = ""
+    async for line in lines:
+        number += 1
+        if not buffer:
+            start = number
+        buffer += line if not buffer else "\n" + line
+        # Nombre impair de guillemets : un champ entre guillemets continue à la ligne suivante
+        if buffer.count('"') % 2:
+            continue
+        text, buffer = buffer.rstrip("\r"), ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield start, None, f"{len(values)} colonnes au lieu de {len(header)}"
+            continue
+        # Champ vide = champ absent (valeur par défaut du modèle)
+        yield start, {k: v for k, v in zip(header, values) if v != ""}, None
+    if buffer:
+        yield start, None, "guillemet non fermé"
+
+
+# ---------- Import ----------
+
+def _timestamp(value, default):
+    # Toujours "YYYY-MM-DD HH:MM:SS" (UTC) : created_at est déclaré DATETIME (affinité NUMERIC),
+    # une valeur qui ressemble à un nombre ("2026") serait comparée comme un nombre
+    if value in (None, ""):
+        return default
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Date invalide : {value!r} (attendu : YYYY-MM-DD[ HH:MM:SS])") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def _resolve_user(record, users):
+    """user_id existant de l'enregistrement (par user_id, sinon par matricule), ou None"""
+    if record.get("user_id") not in (None, ""):
+        key = ("user_id", int(record["user_id"]))
+        query = queries.USER_ID_EXISTS
+    else:
+        key = ("matricule", record.get("matricule"))
+        query = queries.USER_ID_FOR_MATRICULE
+    if key not in users:
+        row = await fetch_one(query, (key[1],))
+        users[key] = row["user_id"] if row else None
+    return users[key]
+
+
+async def _insert_batch(batch, report):
+    """Insérer un lot ; s'il échoue, réessayer ligne par ligne pour isoler les fautives"""
+    try:
+        report.imported += await execute_many(queries.IMPORT_REQUEST, [p for _, p in batch])
+        return
+    except Exception as e:
+        if len(batch) == 1:
+            report.error(batch[0][0], f"insertion refusée : {e}")
+            return
+    for line in batch:
+        await _insert_batch([line], report)
+
+
+async def import_records(records, batch_size=BATCH_SIZE):
+    """Valider et insérer les enregistrements produits par ``jsonl_records``/``csv_records``"""
+    report = ImportReport()
+    users = {}
+    batch = []
+    now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    async for number, record, error in records:
+        if error is not None:
+            report.error(number, error)
+            continue
+        try:
+            data = RequestSubmit(**record)
+            created_at = _timestamp(record.get("created_at"), now)
+            user_id = await _resolve_user(record, users)
+        except ValidationError as e:
+            report.error(number, format_validation_error(e))
+            continue
+        except (TypeError, ValueError) as e:
+            report.error(number, str(e))
+            continue
+        if user_id is None:
+            report.error(number, "utilisateur inconnu")
+            continue
+        batch.append((number, (
+            user_id, data.all_name, data.matricule, data.cycle, data.level, data.nom_code_ue,
+            1 if data.note_exam else 0,
+            1 if data.note_cc else 0,
+            1 if data.note_tp else 0,
+            1 if data.note_tpe else 0,
+            1 if data.autre else 0,
+            data.comment,
+            1 if data.just_p else 0,
+            created_at,
+        )))
+        report.user_ids.add(user_id)
+        if len(batch) >= batch_size:
+            await _insert_batch(batch, report)
+            batch = []
+    if batch:
+        await _insert_batch(batch, report)
+    for user_id in report.user_ids:
+        await user_cache.invalidate(user_id)
+    return report
+
+
+def records_for(format, lines):
+    if format not in FORMATS:
+        raise ValueError(f"Format inconnu : {format} (attendu : {', '.join(FORMATS)})")
+    return jsonl_records(lines) if format == "jsonl" else csv_records(lines)
+
+
+# ---------- Export ----------
+
+def export_period(since=None, until=None):
+    """Paramètres de EXPORT_REQUESTS pour la période [since, until["""
+    return _timestamp(since, "0000-00-00 00:00:00"), _timestamp(until, "9999-12-31 23:59:59")
+
+
+async def export_rows(format, since=None, until=None, chunk_size=500):
+    """Lignes JSONL ou CSV (texte) de la période demandée, au fil de la lecture"""
+    rows = iter_rows(queries.EXPORT_REQUESTS, export_period(since, until), chunk_size=chunk_size)
+    if format == "jsonl":
+        async for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# ---------- Ligne de commande ----------
+
+async def _run_import(args):
+    with open(args.file, "rb") as f:
+        lines = decode_lines(file_chunks(f))
+        report = await import_records(records_for(args.format, lines), args.batch_size)
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.error_count else 0
+
+
+async def _run_export(args):
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        async for text in export_rows(args.format, args.since, args.until):
+            out.write(text)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import / export en masse des requêtes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_import = commands.add_parser("import", help="importer un fichier JSONL ou CSV")
+    p_import.add_argument("file")
+    p_import.add_argument("--format", choices=FORMATS, help="déduit de l'extension par défaut")
+    p_import.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    p_export = commands.add_parser("export", help="exporter les requêtes d'une période")
+    p_export.add_argument("--format", choices=FORMATS, default="jsonl")
+    p_export.add_argument("--since", help="date de début incluse (YYYY-MM-DD)")
+    p_export.add_argument("--until", help="date de fin exclue (YYYY-MM-DD)")
+    p_export.add_argument("-o", "--output", help="fichier de sortie (par défaut : sortie standard)")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        try:
+            export_period(args.since, args.until)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "import":
+        args.format = args.format or ("csv" if args.file.endswith(".csv") else "jsonl")
+        sys.exit(asyncio.run(_run_import(args)))
+    sys.exit(asyncio.run(_run_export(args)))
+
+
+if __name__ == "__main__":
+    main()
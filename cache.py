@@ -0,0 +1,241 @@
+# cache.py - Caches mémoire bornés
+"""Caches bornés : LRU à durée de vie limitée et stockages versionnés.
+
+``MemoryStore`` reste local au processus ; ``SQLiteStore`` est un stockage
+partagé de substitution (fichier SQLite local) qui permet à plusieurs
+workers de voir les mêmes entrées et les mêmes invalidations.
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU borné à ``maxsize`` entrées, chacune valable ``ttl`` secondes"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires = item
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def set_if(self, key, value, predicate, ttl=None):
+        """Écrire ``value`` seulement si ``predicate(valeur actuelle ou None)`` est vrai"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            current = item[0] if item is not _MISSING and item[1] > now else None
+            if not predicate(current):
+                return False
+            self._data[key] = (value, now + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class MemoryStore:
+    """Stockage versionné local au processus.
+
+    Chaque entrée est un couple ``(version, valeur)`` ; ``replace`` n'écrit
+    que si la version n'a pas changé depuis la lecture, ce qui empêche une
+    lecture lente d'écraser une invalidation plus récente.
+    """
+
+    blocking = False
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, version, value):
+        self._cache.set(key, (version, value))
+
+    def replace(self, key, expected_version, version, value):
+        def unchanged(current):
+            return (current[0] if current else None) == expected_version
+        return self._cache.set_if(key, (version, value), unchanged)
+
+    def delete(self, key):
+        self._cache.pop(key)
+
+    def stats(self):
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class SQLiteStore:
+    """Stockage versionné partagé entre processus, dans un fichier SQLite local.
+
+    Remplaçant local d'un cache partagé (type Redis) : mêmes opérations que
+    MemoryStore, valeurs sérialisées en JSON, éviction LRU approximative.
+    Les appels peuvent attendre le verrou du fichier (``blocking``) : depuis
+    du code asynchrone, les faire dans un thread.
+    """
+
+    TRIM_EVERY = 100
+    blocking = True
+
+    def __init__(self, path, maxsize=1024, ttl=300):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    value TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            ''')
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT version, value, accessed FROM cache_entries WHERE key = ? AND expires > ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if now - row[2] > 1:
+                conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0], json.loads(row[1])
+
+    def set(self, key, version, value):
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache_entries (key, version, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(value), now + self.ttl, now)
+            )
+            self._after_write(now)
+
+    def replace(self, key, expected_version, version, value):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            conn = self._connection()
+            if expected_version is None:
+                # Absente (ou expirée) au moment de la lecture : on n'écrit que si c'est toujours le cas
+                conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires <= ?", (key, now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO cache_entries (key, version, value, expires, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, version, payload, now + self.ttl, now)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE cache_entries SET version = ?, value = ?, expires = ?, accessed = ? "
+                    "WHERE key = ? AND version = ? AND expires > ?",
+                    (version, payload, now + self.ttl, now, key, expected_version, now)
+                )
+            self._after_write(now)
+            return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock:
+            self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def _after_write(self, now):
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY:
+            return
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)
+        )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def create_store(maxsize, ttl, backend=None, path=None):
+    """Stockage choisi par CACHE_BACKEND ("memory" par défaut, ou "sqlite")"""
+    backend = backend or os.environ.get("CACHE_BACKEND", "memory")
+    if backend == "sqlite":
+        path = path or os.environ.get("CACHE_PATH", "cache.db")
+        return SQLiteStore(path, maxsize, ttl)
+    return MemoryStore(maxsize, ttl)
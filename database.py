@@ -1,15 +1,67 @@
 # database.py - Version SQLite corrigée
 import sqlite3
 import os
+import random
+import time
+import queue
 import asyncio
-from threading import RLock
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import RLock, Lock, Condition, Thread, local
 
-# Lock pour éviter les problèmes de concurrence
+import migrations
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou de fichier, les migrations restent transactionnelles
+    fcntl = None
+from metrics import TimingStats
+
+# Backend de base de données : "sqlite" (défaut) ou "postgres" (asyncpg, voir database_pg.py)
+DB_BACKEND = os.environ.get("DB_BACKEND", "sqlite")
+
+# Mode de concurrence SQLite :
+#   "wal"  : journal WAL, lectures en parallèle, écritures via un thread dédié
+#   "lock" : ancien comportement, toutes les requêtes sérialisées par db_lock
+DB_CONCURRENCY = os.environ.get("DB_CONCURRENCY", "wal")
+
+# Lock pour éviter les problèmes de concurrence (mode "lock" uniquement)
 db_lock = RLock()
 
+# Taille maximale de la file d'écriture (mode "wal")
+DB_WRITE_QUEUE_SIZE = int(os.environ.get("DB_WRITE_QUEUE_SIZE", "1000"))
+
+# Plusieurs processus (serve.py --workers) : attente d'un verrou SQLite tenu par un autre
+# processus (busy_timeout, en secondes), puis nouveaux essais d'une écriture refusée
+DB_BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", "5"))
+DB_BUSY_RETRIES = int(os.environ.get("DB_BUSY_RETRIES", "3"))
+
+# Group commit : regrouper les INSERT concurrents dans une seule transaction
+DB_GROUP_COMMIT = os.environ.get("DB_GROUP_COMMIT", "0") == "1"
+DB_GROUP_COMMIT_WINDOW_MS = float(os.environ.get("DB_GROUP_COMMIT_WINDOW_MS", "5"))
+DB_GROUP_COMMIT_MAX = int(os.environ.get("DB_GROUP_COMMIT_MAX", "64"))
+
+# Paramètres du pool de connexions (surchargeables par variables d'environnement)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_POOL_MAX_USES = int(os.environ.get("DB_POOL_MAX_USES", "1000"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+DB_POOL_PING_INTERVAL = float(os.environ.get("DB_POOL_PING_INTERVAL", "30"))
+
+# Exécuteur dédié aux lectures (et aux écritures en mode "lock") : un thread par
+# connexion du pool, au plus DB_EXECUTOR_MAX_PENDING tâches en cours ou en attente
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", str(DB_POOL_SIZE)))
+DB_EXECUTOR_MAX_PENDING = int(os.environ.get("DB_EXECUTOR_MAX_PENDING", str(DB_EXECUTOR_WORKERS * 20)))
+# Durée maximale d'une lecture en secondes (0 : pas de limite) ; la requête SQLite est interrompue
+DB_QUERY_TIMEOUT = float(os.environ.get("DB_QUERY_TIMEOUT", "30"))
+DB_RETRY_AFTER = int(os.environ.get("DB_RETRY_AFTER", "1"))
+
 
 def get_db_path():
     """Obtenir le chemin de la base de données"""
+    if 'DB_PATH' in os.environ:
+        return os.environ['DB_PATH']
     if 'VERCEL' in os.environ:
         # Sur Vercel, on utilise /tmp pour l'écriture (éphémère)
         return '/tmp/university_requests.db'
@@ -17,116 +69,830 @@ def get_db_path():
         return 'university_requests.db'
 
 
+class PoolTimeout(Exception):
+    """Aucune connexion libre dans le délai imparti"""
+
+
+class WriteQueueFull(Exception):
+    """La file d'écriture est pleine"""
+
+
+class DatabaseBusy(Exception):
+    """Trop de requêtes en attente dans l'exécuteur : refus immédiat"""
+
+
+class QueryTimeout(Exception):
+    """Requête interrompue après DB_QUERY_TIMEOUT secondes"""
+
+# Erreurs de saturation : l'appelant peut réessayer (503 + Retry-After)
+OVERLOAD_ERRORS = (PoolTimeout, WriteQueueFull, DatabaseBusy, QueryTimeout)
+
+
+lock_wait = TimingStats()
+
+
+def _open_connection(path):
+    """Ouvrir une connexion configurée selon le mode de concurrence"""
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if DB_CONCURRENCY == "wal":
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@contextmanager
+def _serialized():
+    """Prendre db_lock en mode "lock" (en mesurant l'attente), sans effet en mode WAL"""
+    if DB_CONCURRENCY != "lock":
+        yield
+        return
+    start = time.perf_counter()
+    with db_lock:
+        waited = time.perf_counter() - start
+        lock_wait.record(waited)
+        metrics.db_lock_wait.observe(waited)
+        yield
+
+
+def _observed(op, query, run):
+    """Exécuter ``run()`` en enregistrant sa durée (et les lignes lues) pour /metrics"""
+    start = time.perf_counter()
+    result = run()
+    if isinstance(result, list):
+        rows = len(result)
+    elif op == "fetch_one":
+        rows = int(result is not None)
+    else:
+        rows = None
+    metrics.observe_query(op, query, time.perf_counter() - start, rows)
+    return result
+
+
+class _Job:
+    """Tâche de l'exécuteur : la connexion en cours d'utilisation peut être interrompue"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.conn = None
+        self.abandoned = False
+
+    def interrupt(self):
+        with self.lock:
+            self.abandoned = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+
+_current = local()
+
+
+@contextmanager
+def _interruptible(conn):
+    """Rendre ``conn`` interruptible par la tâche courante le temps d'un bloc ``with``"""
+    job = getattr(_current, "job", None)
+    if job is None:
+        yield conn
+        return
+    with job.lock:
+        if job.abandoned:
+            raise QueryTimeout("Requête abandonnée avant son exécution")
+        job.conn = conn
+    try:
+        yield conn
+    finally:
+        # Sous le verrou : pas d'interruption d'une connexion déjà rendue au pool
+        with job.lock:
+            job.conn = None
+
+
+class DatabaseExecutor:
+    """Pool de threads réservé à la base, avec admission bornée et délai par requête.
+
+    Au-delà de ``max_pending`` tâches en cours ou en attente, ``run`` lève
+    DatabaseBusy sans rien mettre en file. Une tâche qui dépasse ``timeout``
+    (ou dont l'appelant est annulé) est retirée de la file si elle n'a pas
+    démarré, sinon sa requête est interrompue par ``Connection.interrupt``.
+    """
+
+    def __init__(self, workers=DB_EXECUTOR_WORKERS, max_pending=DB_EXECUTOR_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="sqlite-read")
+        return self._executor
+
+    async def run(self, fn, timeout=None):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise DatabaseBusy(f"Base de données surchargée ({self.pending} requêtes en attente)")
+        job = _Job()
+        enqueued = time.perf_counter()
+
+        def run():
+            metrics.db_queue_delay.observe(time.perf_counter() - enqueued, executor="database")
+            _current.job = job
+            try:
+                return fn()
+            finally:
+                _current.job = None
+
+        self.pending += 1
+        try:
+            future = self._get_executor().submit(run)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                job.interrupt()
+                raise QueryTimeout(f"Requête interrompue après {timeout} s") from None
+            except asyncio.CancelledError:
+                job.interrupt()
+                raise
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+db_executor = DatabaseExecutor()
+
+
+def _read_timeout():
+    return DB_QUERY_TIMEOUT or None
+
+
+class _PooledConnection:
+    """Connexion du pool avec son compteur d'utilisations"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self.pid = os.getpid()
+        self.broken = False
+
+
+class ConnectionPool:
+    """Pool de connexions SQLite longue durée.
+
+    Les connexions sont réutilisées d'une requête à l'autre (ordre LIFO pour
+    garder les plus chaudes), vérifiées par un ``SELECT 1`` après une période
+    d'inactivité, et recyclées après ``max_uses`` utilisations ou après un
+    fork du processus.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE, max_uses=DB_POOL_MAX_USES,
+                 timeout=DB_POOL_TIMEOUT, ping_interval=DB_POOL_PING_INTERVAL):
+        self.path = path
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._available = Condition(Lock())
+        self._idle = []
+        self._created = 0
+        self._pid = os.getpid()
+
+    def _connect(self):
+        return _PooledConnection(_open_connection(self.path))
+
+    def _check_fork(self):
+        # Les connexions héritées du parent ne doivent être ni réutilisées ni fermées ici
+        if os.getpid() != self._pid:
+            self._idle = []
+            self._created = 0
+            self._pid = os.getpid()
+
+    def _is_healthy(self, entry):
+        if time.monotonic() - entry.last_used < self.ping_interval:
+            return True
+        try:
+            entry.conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, entry):
+        if entry.pid == os.getpid():
+            try:
+                entry.conn.close()
+            except sqlite3.Error:
+                pass
+
+    def acquire(self):
+        """Obtenir une connexion (bloque jusqu'à ``timeout`` si le pool est plein)"""
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            self._check_fork()
+            while not self._idle and self._created >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"Pool de connexions saturé ({self.size} connexions)")
+                self._available.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                self._created += 1
+
+        if entry is not None and self._is_healthy(entry):
+            return entry
+        if entry is not None:
+            self._discard(entry)
+        try:
+            return self._connect()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def release(self, entry):
+        """Rendre une connexion au pool, ou la fermer si elle doit être recyclée"""
+        entry.uses += 1
+        entry.last_used = time.monotonic()
+        recycle = entry.broken or entry.uses >= self.max_uses
+        with self._available:
+            self._check_fork()
+            if entry.pid != self._pid:
+                # Connexion d'un ancien processus : le compteur a déjà été remis à zéro
+                recycle = True
+            elif recycle:
+                self._created -= 1
+            else:
+                self._idle.append(entry)
+            self._available.notify()
+        if recycle:
+            self._discard(entry)
+
+    @contextmanager
+    def connection(self):
+        """Emprunter une connexion le temps d'un bloc ``with``"""
+        entry = self.acquire()
+        try:
+            yield entry.conn
+        except BaseException:
+            try:
+                entry.conn.rollback()
+            except sqlite3.Error:
+                entry.broken = True
+            raise
+        finally:
+            self.release(entry)
+
+    def close(self):
+        """Fermer toutes les connexions inactives"""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self):
+        with self._available:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+            }
+
+
+_pool = None
+_pool_lock = Lock()
+
+
+def get_pool():
+    """Pool de connexions du processus (recréé si le chemin de la base change)"""
+    global _pool
+    path = get_db_path()
+    pool = _pool
+    if pool is None or pool.path != path:
+        with _pool_lock:
+            if _pool is None or _pool.path != path:
+                if _pool is not None:
+                    _pool.close()
+                pool = ConnectionPool(path)
+                _prepare_schema(pool)
+                _pool = pool
+            pool = _pool
+    return pool
+
+
+def _is_busy(error):
+    """Base verrouillée par une autre connexion (ou un autre processus) : l'opération peut être rejouée"""
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error)
+    )
+
+
+@contextmanager
+def _file_lock(path):
+    """Verrou exclusif entre processus sur ``<base>.lock`` (sans effet sans fcntl ou en mémoire)"""
+    if fcntl is None or path == ":memory:":
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _prepare_schema(pool):
+    """Créer les tables et appliquer les migrations manquantes (une fois par base et par processus).
+
+    Plusieurs workers démarrent en même temps : le premier prépare le schéma
+    sous le verrou de fichier, les suivants n'ont plus rien à appliquer.
+    """
+    with _file_lock(pool.path), _serialized(), pool.connection() as conn:
+        for statement in migrations.BASE_SCHEMA["sqlite"]:
+            conn.execute(statement)
+        conn.commit()
+        done = migrations.apply_sqlite(conn)
+    if done:
+        print(f"Migrations appliquées: {done}")
+    return done
+
+
+# Aucune tâche mise de côté (None est le signal d'arrêt, il ne doit pas être perdu)
+_NO_PENDING = object()
+
+
+class SQLiteWriter:
+    """Thread unique d'écriture alimenté par une file bornée.
+
+    Chaque tâche est une fonction ``fn(conn)`` exécutée sur la connexion
+    dédiée du thread ; le résultat (ou l'exception) est renvoyé via un
+    ``concurrent.futures.Future``.
+
+    Les tâches soumises avec ``grouped=True`` ne font pas leur propre
+    commit : le thread les accumule pendant ``DB_GROUP_COMMIT_WINDOW_MS``
+    (ou jusqu'à ``DB_GROUP_COMMIT_MAX`` tâches) et les valide en une seule
+    transaction. Chaque tâche tourne dans son propre SAVEPOINT, donc une
+    erreur n'annule que la tâche fautive.
+    """
+
+    def __init__(self, path, max_queue=DB_WRITE_QUEUE_SIZE):
+        self.path = path
+        self.pid = os.getpid()
+        self.wait = TimingStats()
+        self.max_depth = 0
+        self.batches = 0
+        self.grouped_writes = 0
+        self.busy_retries = 0
+        self._pending = _NO_PENDING
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, grouped=False):
+        """Mettre une écriture en file ; lève WriteQueueFull si la file est pleine"""
+        future = Future()
+        try:
+            self._queue.put_nowait((fn, future, time.perf_counter(), grouped))
+        except queue.Full:
+            raise WriteQueueFull(
+                f"File d'écriture pleine ({self._queue.maxsize} écritures en attente)"
+            )
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return future
+
+    def _next_job(self, timeout=None):
+        if self._pending is not _NO_PENDING:
+            job, self._pending = self._pending, _NO_PENDING
+            return job
+        return self._queue.get(timeout=timeout)
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + DB_GROUP_COMMIT_WINDOW_MS / 1000
+        while len(batch) < DB_GROUP_COMMIT_MAX:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._next_job(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None or not job[3]:
+                # Écriture simple ou arrêt : traité après la validation du lot
+                self._pending = job
+                break
+            batch.append(job)
+        return batch
+
+    def _start(self, job):
+        fn, future, enqueued, grouped = job
+        waited = time.perf_counter() - enqueued
+        self.wait.record(waited)
+        metrics.db_queue_delay.observe(waited, executor="writer")
+        return future.set_running_or_notify_cancel()
+
+    def _retry_busy(self, attempt, error):
+        """Attendre avant de rejouer une écriture refusée par un verrou d'un autre processus"""
+        if attempt >= DB_BUSY_RETRIES or not _is_busy(error):
+            return False
+        self.busy_retries += 1
+        time.sleep(random.uniform(0.01, 0.05) * 2 ** attempt)
+        return True
+
+    def _run_single(self, conn, job):
+        fn, future = job[0], job[1]
+        attempt = 0
+        while True:
+            try:
+                result = fn(conn)
+            except BaseException as e:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                if self._retry_busy(attempt, e):
+                    attempt += 1
+                    continue
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            return
+
+    def _run_batch(self, conn, jobs, attempt=0):
+        outcomes = []
+        try:
+            # Verrou d'écriture pris dès le début : le busy_timeout s'applique ici
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future, _, _ in jobs:
+                conn.execute("SAVEPOINT grouped_write")
+                try:
+                    outcomes.append((future, fn(conn), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO grouped_write")
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE grouped_write")
+            conn.commit()
+        except BaseException as e:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            if self._retry_busy(attempt, e):
+                return self._run_batch(conn, jobs, attempt + 1)
+            for _, future, _, _ in jobs:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.grouped_writes += len(jobs)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run(self):
+        conn = None
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            jobs = self._collect_batch(job) if job[3] else [job]
+            jobs = [j for j in jobs if self._start(j)]
+            if not jobs:
+                continue
+            try:
+                if conn is None:
+                    conn = _open_connection(self.path)
+            except BaseException as e:
+                for j in jobs:
+                    j[1].set_exception(e)
+                continue
+            if job[3]:
+                self._run_batch(conn, jobs)
+            else:
+                self._run_single(conn, jobs[0])
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "capacity": self._queue.maxsize,
+            "busy_retries": self.busy_retries,
+            "wait": self.wait.snapshot(),
+            "group_commit": {
+                "enabled": DB_GROUP_COMMIT,
+                "batches": self.batches,
+                "writes": self.grouped_writes,
+                "avg_batch": round(self.grouped_writes / self.batches, 2) if self.batches else 0.0,
+            },
+        }
+
+
+_writer = None
+_writer_lock = Lock()
+
+
+def get_writer():
+    """Thread d'écriture du processus (recréé après un fork ou un changement de base)"""
+    global _writer
+    path = get_db_path()
+    writer = _writer
+    if writer is None or writer.path != path or writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.path != path or _writer.pid != os.getpid():
+                # Le schéma est préparé à la création du pool de lecture
+                get_pool()
+                if _writer is not None and _writer.pid == os.getpid():
+                    _writer.close()
+                _writer = SQLiteWriter(path)
+            writer = _writer
+    return writer
+
+
 def init_db():
     """Initialiser la base de données avec les tables"""
     db_path = get_db_path()
     print(f"Initialisation de la base de données à: {db_path}")
     
-    with db_lock:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        
-        try:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    matricule TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    last_name TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    phone TEXT NOT NULL,
-                    password TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS requests (
-                    request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    all_name TEXT NOT NULL,
-                    matricule TEXT NOT NULL,
-                    cycle TEXT NOT NULL,
-                    level INTEGER NOT NULL,
-                    nom_code_ue TEXT NOT NULL,
-                    note_exam BOOLEAN DEFAULT FALSE,
-                    note_cc BOOLEAN DEFAULT FALSE,
-                    note_tp BOOLEAN DEFAULT FALSE,
-                    note_tpe BOOLEAN DEFAULT FALSE,
-                    autre BOOLEAN DEFAULT FALSE,
-                    comment TEXT,
-                    just_p BOOLEAN DEFAULT FALSE,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            
+    try:
+        _prepare_schema(get_pool())
+    except Exception as e:
+        print(f"Erreur lors de l'initialisation: {e}")
+
+
+def make_row_factory(row_type, columns):
+    """Convertisseur de ligne pour iter_rows : dict, tuple ou namedtuple"""
+    if row_type == "dict":
+        return lambda row: dict(zip(columns, row))
+    if row_type == "tuple":
+        return tuple
+    if row_type == "namedtuple":
+        Row = namedtuple("Row", columns, rename=True)
+        return lambda row: Row(*row)
+    raise ValueError(f"Type de ligne inconnu: {row_type}")
+
+
+async def _acquire(pool):
+    """Emprunter une connexion via l'exécuteur, sans la perdre en cas d'annulation.
+
+    Le thread qui attend une connexion ne s'arrête pas avec la tâche : si
+    celle-ci est annulée entre-temps, la connexion obtenue est rendue au pool
+    dès qu'elle arrive.
+    """
+    task = asyncio.ensure_future(db_executor.run(pool.acquire))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        def release(done):
+            if not done.cancelled() and done.exception() is None:
+                pool.release(done.result())
+
+        task.add_done_callback(release)
+        raise
+
+
+class SQLiteBackend:
+    """Backend par défaut : sqlite3 via le pool de connexions et le thread d'écriture"""
+
+    name = "sqlite"
+
+    async def _write(self, write):
+        """Exécuter ``write(conn)`` sur le thread d'écriture (WAL) ou sous le verrou global"""
+        if DB_CONCURRENCY == "wal":
+            return await asyncio.wrap_future(get_writer().submit(write))
+
+        def sync_execute():
+            with _serialized(), get_pool().connection() as conn:
+                return write(conn)
+
+        # Pas de délai : une écriture interrompue pourrait déjà être validée
+        return await db_executor.run(sync_execute)
+
+    async def execute(self, query, params=()):
+        def write(conn):
+            cursor = _observed("execute", query, lambda: conn.execute(query, params))
             conn.commit()
-        except Exception as e:
-            print(f"Erreur lors de l'initialisation: {e}")
+            return cursor.lastrowid
+
+        return await self._write(write)
+
+    async def execute_grouped(self, query, params=()):
+        if not (DB_GROUP_COMMIT and DB_CONCURRENCY == "wal"):
+            return await self.execute(query, params)
+
+        def write(conn):
+            return _observed("execute", query, lambda: conn.execute(query, params)).lastrowid
+
+        return await asyncio.wrap_future(get_writer().submit(write, grouped=True))
+
+    async def execute_many(self, query, seq_of_params):
+        def write(conn):
+            try:
+                _observed("execute_many", query, lambda: conn.executemany(query, seq_of_params))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return len(seq_of_params)
+
+        return await self._write(write)
+
+    async def execute_returning(self, query, params=()):
+        def write(conn):
+            try:
+                rows = _observed(
+                    "execute_returning", query, lambda: [dict(r) for r in conn.execute(query, params).fetchall()]
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return rows
+
+        return await self._write(write)
+
+    async def fetch_one(self, query, params=()):
+        def sync_fetch():
+            with _serialized(), get_pool().connection() as conn, _interruptible(conn):
+                result = _observed("fetch_one", query, lambda: conn.execute(query, params).fetchone())
+                return dict(result) if result else None
+
+        return await db_executor.run(sync_fetch, _read_timeout())
+
+    async def fetch_all(self, query, params=()):
+        def sync_fetch():
+            with _serialized(), get_pool().connection() as conn, _interruptible(conn):
+                rows = _observed("fetch_all", query, lambda: conn.execute(query, params).fetchall())
+                return [dict(r) for r in rows]
+
+        return await db_executor.run(sync_fetch, _read_timeout())
+
+    async def iter_rows(self, query, params=(), chunk_size=500, row_type="dict"):
+        pool = get_pool()
+        entry = None
+        cursor = None
+
+        def open_cursor():
+            with _serialized(), _interruptible(entry.conn):
+                return _observed("iter_rows", query, lambda: entry.conn.execute(query, params))
+
+        def fetch_chunk():
+            with _serialized(), _interruptible(entry.conn):
+                return _observed("iter_rows_chunk", query, lambda: cursor.fetchmany(chunk_size))
+
+        try:
+            entry = await _acquire(pool)
+            cursor = await db_executor.run(open_cursor, _read_timeout())
+            convert = make_row_factory(row_type, [d[0] for d in cursor.description])
+            while True:
+                # Délai par lot : un export long n'est pas interrompu tant qu'il progresse
+                rows = await db_executor.run(fetch_chunk, _read_timeout())
+                if len(rows) < chunk_size:
+                    # Dernier lot : rendre la connexion avant de le transmettre
+                    cursor.close()
+                    pool.release(entry)
+                    entry = None
+                for row in rows:
+                    yield convert(row)
+                if entry is None:
+                    return
         finally:
-            conn.close()
+            if entry is not None:
+                if cursor is not None:
+                    cursor.close()
+                pool.release(entry)
+
+    async def init_schema(self):
+        # Le schéma est préparé à la création du pool
+        await db_executor.run(get_pool)
+
+    async def version(self):
+        result = await self.fetch_one("SELECT sqlite_version() as version")
+        return result['version']
+
+    async def close(self):
+        global _writer
+        db_executor.shutdown()
+        with _writer_lock:
+            writer, _writer = _writer, None
+        if writer is not None and writer.pid == os.getpid():
+            # Les écritures déjà en file sont terminées avant l'arrêt du thread
+            writer.close()
+        if _pool is not None:
+            _pool.close()
+
+    def stats(self):
+        """Statistiques de contention : pool, file d'écriture et attente du verrou"""
+        stats = {
+            "mode": DB_CONCURRENCY,
+            "pool": get_pool().stats(),
+            "lock_wait": lock_wait.snapshot(),
+            "executor": db_executor.stats(),
+        }
+        if DB_CONCURRENCY == "wal":
+            stats["write_queue"] = get_writer().stats()
+        return stats
+
 
+_backend = None
 
-# On initialise la DB une seule fois
-db_path = get_db_path()
-if not os.path.exists(db_path):
-    init_db()
+
+def get_backend():
+    """Backend sélectionné par DB_BACKEND (instancié au premier appel)"""
+    global _backend
+    if _backend is None:
+        if DB_BACKEND == "postgres":
+            from database_pg import PostgresBackend
+            _backend = PostgresBackend()
+        else:
+            _backend = SQLiteBackend()
+    return _backend
+
+
+def get_db_stats():
+    """Statistiques du backend courant"""
+    backend = get_backend()
+    return {"backend": backend.name, **backend.stats()}
+
+
+async def init_schema():
+    """Préparer le schéma au démarrage de l'application (sinon fait à la première requête)"""
+    await get_backend().init_schema()
+
+
+async def shutdown_database():
+    """Libérer les ressources du processus à l'arrêt (exécuteur, thread d'écriture, connexions)"""
+    if _backend is not None:
+        await _backend.close()
 
 
 async def execute_query(query, params=()):
     """Exécuter une requête SQL"""
-    def sync_execute():
-        with db_lock:
-            conn = sqlite3.connect(get_db_path())
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            try:
-                cursor.execute(query, params)
-                conn.commit()
-                return cursor.lastrowid
-            finally:
-                conn.close()
-    
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, sync_execute)
+    return await get_backend().execute(query, params)
+
+
+async def execute_grouped(query, params=()):
+    """Exécuter un INSERT via le group commit (repli sur execute_query s'il est désactivé)"""
+    return await get_backend().execute_grouped(query, params)
+
+
+async def execute_many(query, seq_of_params):
+    """Exécuter une requête pour chaque jeu de paramètres, dans une seule transaction"""
+    return await get_backend().execute_many(query, list(seq_of_params))
+
+
+async def execute_returning(query, params=()):
+    """Exécuter une écriture avec RETURNING et récupérer les lignes produites"""
+    return await get_backend().execute_returning(query, params)
 
 
 async def fetch_one(query, params=()):
     """Récupérer une seule ligne"""
-    def sync_fetch():
-        with db_lock:
-            conn = sqlite3.connect(get_db_path())
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            conn.close()
-            return dict(result) if result else None
-    
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, sync_fetch)
+    return await get_backend().fetch_one(query, params)
 
 
 async def fetch_all(query, params=()):
     """Récupérer toutes les lignes"""
-    def sync_fetch():
-        with db_lock:
-            conn = sqlite3.connect(get_db_path())
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
-            return [dict(r) for r in rows]
-    
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, sync_fetch)
+    return await get_backend().fetch_all(query, params)
+
+
+def iter_rows(query, params=(), chunk_size=500, row_type="dict"):
+    """Parcourir un résultat par lots (fetchmany) sans le charger entièrement en mémoire.
+
+    ``row_type`` vaut "dict" (par défaut), "tuple" ou "namedtuple". La
+    connexion reste empruntée au pool tant que le générateur n'est pas
+    épuisé ou fermé (``aclose``).
+    """
+    return get_backend().iter_rows(query, params, chunk_size, row_type)
 
 
 async def test_connection():
     try:
-        result = await fetch_one("SELECT sqlite_version() as version")
-        return {"status": "success", "version": result['version']}
+        return {"status": "success", "version": await get_backend().version()}
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
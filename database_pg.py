@@ -0,0 +1,202 @@
+# database_pg.py - Backend PostgreSQL natif (asyncpg)
+"""Backend asyncpg sélectionné par ``DB_BACKEND=postgres``.
+
+Les requêtes de l'application sont écrites avec des paramètres ``?`` (style
+sqlite3) ; elles sont traduites en ``$1, $2, ...`` une seule fois puis mises
+en cache. asyncpg prépare chaque requête côté serveur et garde les
+statements préparés dans un cache par connexion (``PG_STATEMENT_CACHE_SIZE``).
+"""
+import asyncio
+import os
+import re
+import time
+from functools import lru_cache
+
+import asyncpg
+
+import metrics
+import migrations
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql://localhost/university_requests")
+PG_POOL_MIN_SIZE = int(os.environ.get("PG_POOL_MIN_SIZE", "1"))
+PG_POOL_MAX_SIZE = int(os.environ.get("PG_POOL_MAX_SIZE", "10"))
+PG_STATEMENT_CACHE_SIZE = int(os.environ.get("PG_STATEMENT_CACHE_SIZE", "256"))
+
+# Clé primaire renvoyée comme "lastrowid" après un INSERT
+PRIMARY_KEYS = {
+    "users": "user_id",
+    "requests": "request_id",
+}
+
+_PLACEHOLDER = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\?")
+_INSERT_TABLE = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def translate_query(query):
+    """Remplacer les ``?`` (hors littéraux) par ``$1, $2, ...``"""
+    counter = 0
+
+    def replace(match):
+        nonlocal counter
+        if match.group(0) != "?":
+            return match.group(0)
+        counter += 1
+        return f"${counter}"
+
+    return _PLACEHOLDER.sub(replace, query)
+
+
+@lru_cache(maxsize=512)
+def _prepare_insert(query):
+    """Ajouter ``RETURNING <clé primaire>`` aux INSERT pour émuler lastrowid"""
+    translated = translate_query(query)
+    match = _INSERT_TABLE.match(query)
+    if not match or re.search(r"\bRETURNING\b", query, re.IGNORECASE):
+        return translated, False
+    pk = PRIMARY_KEYS.get(match.group(1).lower())
+    if pk is None:
+        return translated, False
+    return f"{translated.rstrip().rstrip(';')} RETURNING {pk}", True
+
+
+def _read_timeout():
+    from database import DB_QUERY_TIMEOUT
+    return DB_QUERY_TIMEOUT or None
+
+
+async def _observed(op, query, awaitable):
+    """Attendre ``awaitable`` en enregistrant sa durée (et les lignes lues) pour /metrics"""
+    start = time.perf_counter()
+    try:
+        result = await awaitable
+    except asyncio.TimeoutError:
+        # Délai asyncpg dépassé : la requête a été annulée côté serveur
+        from database import QueryTimeout
+        raise QueryTimeout(f"Requête interrompue après {_read_timeout()} s") from None
+    if isinstance(result, list):
+        rows = len(result)
+    elif op == "fetch_one":
+        rows = int(result is not None)
+    else:
+        rows = None
+    metrics.observe_query(op, query, time.perf_counter() - start, rows)
+    return result
+
+
+class PostgresBackend:
+    """Backend asyncpg : pool de connexions natif, sans thread intermédiaire"""
+
+    name = "postgres"
+
+    def __init__(self, dsn=DATABASE_URL):
+        self.dsn = dsn
+        self._pool = None
+        self._loop = None
+        self._lock = None
+
+    async def _get_pool(self):
+        loop = asyncio.get_running_loop()
+        if self._pool is not None and self._loop is loop:
+            return self._pool
+        if self._lock is None or self._loop is not loop:
+            # Un pool asyncpg est lié à sa boucle d'événements
+            self._lock = asyncio.Lock()
+            self._loop = loop
+            self._pool = None
+        async with self._lock:
+            if self._pool is None:
+                pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=PG_POOL_MIN_SIZE,
+                    max_size=PG_POOL_MAX_SIZE,
+                    statement_cache_size=PG_STATEMENT_CACHE_SIZE,
+                )
+                async with pool.acquire() as conn:
+                    for statement in migrations.BASE_SCHEMA["postgres"]:
+                        await conn.execute(statement)
+                    await migrations.apply_postgres(conn)
+                self._pool = pool
+        return self._pool
+
+    async def execute(self, query, params=()):
+        pool = await self._get_pool()
+        sql, returning = _prepare_insert(query)
+        if returning:
+            return await _observed("execute", query, pool.fetchval(sql, *params))
+        await _observed("execute", query, pool.execute(sql, *params))
+        return None
+
+    async def execute_grouped(self, query, params=()):
+        # Chaque connexion du pool valide ses propres transactions : pas de regroupement ici
+        return await self.execute(query, params)
+
+    async def execute_many(self, query, seq_of_params):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await _observed("execute_many", query, conn.executemany(translate_query(query), seq_of_params))
+        return len(seq_of_params)
+
+    async def execute_returning(self, query, params=()):
+        pool = await self._get_pool()
+        rows = await _observed("execute_returning", query, pool.fetch(translate_query(query), *params))
+        return [dict(r) for r in rows]
+
+    async def fetch_one(self, query, params=()):
+        pool = await self._get_pool()
+        row = await _observed("fetch_one", query, pool.fetchrow(translate_query(query), *params, timeout=_read_timeout()))
+        return dict(row) if row else None
+
+    async def fetch_all(self, query, params=()):
+        pool = await self._get_pool()
+        rows = await _observed(
+            "fetch_all", query, pool.fetch(translate_query(query), *params, timeout=_read_timeout())
+        )
+        return [dict(r) for r in rows]
+
+    async def iter_rows(self, query, params=(), chunk_size=500, row_type="dict"):
+        from database import make_row_factory
+
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            # Les curseurs côté serveur d'asyncpg n'existent qu'à l'intérieur d'une transaction
+            async with conn.transaction():
+                cursor = await conn.cursor(translate_query(query), *params)
+                convert = None
+                while True:
+                    rows = await _observed(
+                        "iter_rows_chunk", query, cursor.fetch(chunk_size, timeout=_read_timeout())
+                    )
+                    if not rows:
+                        break
+                    if convert is None:
+                        convert = make_row_factory(row_type, list(rows[0].keys()))
+                    for row in rows:
+                        yield convert(row)
+                    if len(rows) < chunk_size:
+                        break
+
+    async def init_schema(self):
+        await self._get_pool()
+
+    async def version(self):
+        pool = await self._get_pool()
+        return await pool.fetchval("SHOW server_version")
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def stats(self):
+        if self._pool is None:
+            return {"pool": None}
+        return {
+            "pool": {
+                "size": self._pool.get_size(),
+                "idle": self._pool.get_idle_size(),
+                "min_size": self._pool.get_min_size(),
+                "max_size": self._pool.get_max_size(),
+            }
+        }
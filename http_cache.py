@@ -0,0 +1,101 @@
+# http_cache.py - Cache HTTP des pages anonymes et des fichiers statiques
+"""Mise en cache côté serveur et côté client.
+
+- Les pages publiques (``/``, ``/login``, ``/register``) ne dépendent que
+  du template tant que le visiteur n'a pas de cookie de session : leur HTML
+  est gardé en mémoire et servi avec un ETag (304 si inchangé).
+- Les fichiers statiques sont référencés par ``static_url()``, qui ajoute
+  une empreinte du contenu (``?v=...``) ; ces URL sont servies avec un
+  ``Cache-Control`` d'un an, puisque toute modification change l'URL.
+"""
+import hashlib
+import os
+from urllib.parse import parse_qs
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+from cache import TTLCache
+from templating import templates, TEMPLATE_AUTO_RELOAD
+
+STATIC_DIR = "static"
+
+# Désactivé par défaut en développement, où les templates peuvent changer à chaud
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "0" if TEMPLATE_AUTO_RELOAD else "1") == "1"
+PAGE_CACHE_TTL = float(os.environ.get("PAGE_CACHE_TTL", "300"))
+
+# Cookies qui changent le rendu de base.html
+SESSION_COOKIES = ("user_data", "user_id")
+
+PAGE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+STATIC_IMMUTABLE = "public, max-age=31536000, immutable"
+STATIC_DEFAULT = "public, max-age=300"
+
+page_cache = TTLCache(maxsize=64, ttl=PAGE_CACHE_TTL)
+_static_hashes = {}
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Vrai si If-None-Match contient ``etag`` (ou ``*``)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(
+        value.removeprefix("W/") == etag for value in candidates
+    )
+
+
+def is_anonymous(request: Request) -> bool:
+    return not any(request.cookies.get(name) for name in SESSION_COOKIES)
+
+
+def render_public_page(request: Request, name: str):
+    """Page publique servie depuis le cache mémoire, avec ETag et 304"""
+    if not (PAGE_CACHE_ENABLED and is_anonymous(request)):
+        return templates.TemplateResponse(name, {"request": request})
+
+    entry = page_cache.get(name)
+    if entry is None:
+        body = templates.TemplateResponse(name, {"request": request}).body
+        entry = (body, etag_for(body))
+        page_cache.set(name, entry)
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL, "Vary": "Cookie"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+
+def static_url(path: str) -> str:
+    """URL d'un fichier statique avec empreinte de contenu (``/static/x.css?v=...``)"""
+    full_path = os.path.join(STATIC_DIR, path)
+    try:
+        mtime = os.stat(full_path).st_mtime_ns
+    except OSError:
+        return f"/static/{path}"
+    cached = _static_hashes.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(full_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        cached = _static_hashes[path] = (mtime, digest)
+    return f"/static/{path}?v={cached[1]}"
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles avec Cache-Control longue durée pour les URL versionnées"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        # Seule l'empreinte courante est immuable : une ancienne URL ne doit pas figer le nouveau contenu
+        version = parse_qs(scope.get("query_string", b"").decode()).get("v", [None])[0]
+        current = static_url(os.path.relpath(full_path, self.directory)).partition("?v=")[2]
+        immutable = version is not None and version == current
+        response.headers["Cache-Control"] = STATIC_IMMUTABLE if immutable else STATIC_DEFAULT
+        return response
@@ -0,0 +1,278 @@
+# metrics.py - Mesures internes (temps d'attente, durées) et export Prometheus
+"""Mesures de l'application.
+
+- ``TimingStats`` : cumul simple de durées, affiché dans /db-status.
+- ``Counter``, ``Gauge``, ``Histogram`` : métriques au format texte de
+  Prometheus, exposées par /metrics (sans dépendance externe).
+- ``PrometheusMiddleware`` : durée de chaque requête HTTP par route.
+- ``observe_query`` : durée et lignes de chaque requête SQL, regroupées par
+  empreinte de requête ; journal des requêtes lentes si DB_SLOW_QUERY_MS > 0.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from threading import Lock
+
+
+class TimingStats:
+    """Cumul de durées : nombre, total, moyenne et maximum"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "total_ms": round(self.total * 1000, 3),
+                "avg_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 3),
+            }
+
+
+# ---------- Métriques Prometheus ----------
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            lines.extend(self._render_one(key, value))
+        return lines
+
+    def _render_one(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [compte par intervalle..., somme, nombre]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _render_one(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[:-2]):
+            cumulative += count
+            labels = _labels(self.labelnames, key, ("le", _number(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_number(state[-2])}")
+        lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+def render():
+    """Toutes les métriques au format texte de Prometheus"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- HTTP ----------
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP (jusqu'au dernier octet)",
+    ("method", "route", "status"),
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours de traitement", ("method",),
+)
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI : durée de chaque requête, étiquetée par modèle de route (/my-requests, /static...)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_name(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None) or getattr(route, "app", None): route.path
+                for route in getattr(scope.get("app"), "routes", [])
+            }
+        return self._routes.get(endpoint, "other")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        method = scope["method"]
+        http_requests_in_progress.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec(method=method)
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=method, route=self._route_name(scope), status=status,
+            )
+
+
+# ---------- Base de données ----------
+
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Durée d'exécution des requêtes SQL (hors attente)",
+    ("op", "query"),
+)
+db_query_rows = Histogram(
+    "db_query_rows", "Lignes renvoyées par les lectures", ("op", "query"), buckets=ROWS_BUCKETS,
+)
+db_query_info = Gauge(
+    "db_query_info", "Texte (tronqué) associé à chaque empreinte de requête", ("query", "sql"),
+)
+db_lock_wait = Histogram("db_lock_wait_seconds", "Attente du verrou global (mode lock)")
+db_queue_delay = Histogram(
+    "db_executor_queue_seconds", "Attente avant exécution : exécuteur de lecture ou thread d'écriture",
+    ("executor",),
+)
+db_slow_queries = Counter("db_slow_queries_total", "Requêtes plus lentes que DB_SLOW_QUERY_MS", ("query",))
+
+DB_SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "0"))
+slow_query_log = logging.getLogger("database.slow")
+
+_SPACES = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(query):
+    """Empreinte courte d'une requête : espaces normalisés, listes de ? réduites à une seule"""
+    normalized = _PLACEHOLDER_LIST.sub("?, ...", _SPACES.sub(" ", query).strip())
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    db_query_info.set(1, query=digest, sql=normalized[:200])
+    return digest
+
+
+def observe_query(op, query, seconds, rows=None):
+    """Enregistrer une requête SQL exécutée (et la journaliser si elle est lente)"""
+    key = fingerprint(query)
+    db_query_duration.observe(seconds, op=op, query=key)
+    if rows is not None:
+        db_query_rows.observe(rows, op=op, query=key)
+    if DB_SLOW_QUERY_MS and seconds * 1000 >= DB_SLOW_QUERY_MS:
+        db_slow_queries.inc(query=key)
+        slow_query_log.warning(
+            "requête lente : %.1f ms, %s [%s] %s", seconds * 1000, op, key, _SPACES.sub(" ", query).strip()[:500]
+        )
+
+
+# ---------- Composants (pool, files, caches) ----------
+
+component_stats = Gauge(
+    "app_component_stat", "Valeurs numériques des statistiques internes (pool, files, caches)",
+    ("component", "stat"),
+)
+
+
+def publish_stats(component, stats, prefix=""):
+    """Recopier les valeurs numériques d'un dictionnaire de statistiques (imbriqué) dans une jauge"""
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            publish_stats(component, value, f"{prefix}{name}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            component_stats.set(value, component=component, stat=f"{prefix}{name}")
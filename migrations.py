@@ -0,0 +1,363 @@
+# migrations.py - Migrations de schéma versionnées
+"""Migrations appliquées dans l'ordre et enregistrées dans ``schema_migrations``.
+
+Chaque migration est un numéro de version, un nom et la liste des
+instructions SQL à exécuter ; ``postgres`` permet de fournir une variante
+quand la syntaxe diffère de SQLite. Une migration déjà enregistrée n'est
+jamais rejouée.
+"""
+
+# Schéma de base (avant toute migration). Côté PostgreSQL, les drapeaux restent
+# des entiers 0/1 et created_at un texte "YYYY-MM-DD HH:MM:SS" comme
+# CURRENT_TIMESTAMP de SQLite, pour que l'application et les templates se
+# comportent à l'identique sur les deux backends.
+BASE_SCHEMA = {
+    "sqlite": [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            matricule TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            phone TEXT NOT NULL,
+            password TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            all_name TEXT NOT NULL,
+            matricule TEXT NOT NULL,
+            cycle TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            nom_code_ue TEXT NOT NULL,
+            note_exam BOOLEAN DEFAULT FALSE,
+            note_cc BOOLEAN DEFAULT FALSE,
+            note_tp BOOLEAN DEFAULT FALSE,
+            note_tpe BOOLEAN DEFAULT FALSE,
+            autre BOOLEAN DEFAULT FALSE,
+            comment TEXT,
+            just_p BOOLEAN DEFAULT FALSE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+        ''',
+    ],
+    "postgres": [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id SERIAL PRIMARY KEY,
+            matricule TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            phone TEXT NOT NULL,
+            password TEXT NOT NULL,
+            created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS requests (
+            request_id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (user_id),
+            all_name TEXT NOT NULL,
+            matricule TEXT NOT NULL,
+            cycle TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            nom_code_ue TEXT NOT NULL,
+            note_exam SMALLINT DEFAULT 0,
+            note_cc SMALLINT DEFAULT 0,
+            note_tp SMALLINT DEFAULT 0,
+            note_tpe SMALLINT DEFAULT 0,
+            autre SMALLINT DEFAULT 0,
+            comment TEXT,
+            just_p SMALLINT DEFAULT 0,
+            created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+        )
+        ''',
+    ],
+}
+
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "index_requests_par_utilisateur",
+        # /my-requests : WHERE user_id = ? ORDER BY created_at DESC (+ request_id pour la pagination)
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS idx_requests_user_created "
+            "ON requests (user_id, created_at, request_id)",
+        ],
+    },
+    {
+        "version": 2,
+        "name": "statut_de_traitement",
+        # File de traitement : statut, agent, date de prise en charge et de traitement.
+        # L'index sert la prise en charge (status = 'pending' ORDER BY created_at)
+        # et la libération des prises en charge expirées (status = 'in_progress').
+        "sqlite": [
+            "ALTER TABLE requests ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'",
+            "ALTER TABLE requests ADD COLUMN assignee TEXT",
+            "ALTER TABLE requests ADD COLUMN claimed_at DATETIME",
+            "ALTER TABLE requests ADD COLUMN processed_at DATETIME",
+            "CREATE INDEX IF NOT EXISTS idx_requests_status_created "
+            "ON requests (status, created_at, request_id)",
+        ],
+        "postgres": [
+            "ALTER TABLE requests ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'pending'",
+            "ALTER TABLE requests ADD COLUMN IF NOT EXISTS assignee TEXT",
+            "ALTER TABLE requests ADD COLUMN IF NOT EXISTS claimed_at TEXT",
+            "ALTER TABLE requests ADD COLUMN IF NOT EXISTS processed_at TEXT",
+            "CREATE INDEX IF NOT EXISTS idx_requests_status_created "
+            "ON requests (status, created_at, request_id)",
+        ],
+    },
+]
+
+# ---------- Statistiques agrégées (migration 3) ----------
+# request_stats garde un compteur par (dimension, valeur), tenu à jour par des
+# triggers : les tableaux de bord lisent ces quelques lignes au lieu de parcourir
+# requests. Chaque dimension : (nom, expression de la valeur, condition ou None),
+# {row} désignant la ligne (NEW, OLD ou l'alias du remplissage initial).
+NOTE_FLAGS = ("note_exam", "note_cc", "note_tp", "note_tpe", "autre", "just_p")
+
+STAT_DIMENSIONS = [
+    ("total", "''", None),
+    ("ue", "{row}.nom_code_ue", None),
+    ("cycle_level", "{row}.cycle || ' / ' || {row}.level", None),
+    ("day", "substr({row}.created_at, 1, 10)", None),
+] + [("note", f"'{flag}'", f"{{row}}.{flag} <> 0") for flag in NOTE_FLAGS]
+
+STATUS_DIMENSION = ("status", "{row}.status", None)
+USERS_DIMENSION = ("users", "''", None)
+
+# Colonnes dont dépendent les dimensions autres que le statut
+STAT_COLUMNS = ("nom_code_ue", "cycle", "level", "created_at") + NOTE_FLAGS
+
+CREATE_REQUEST_STATS = '''
+    CREATE TABLE IF NOT EXISTS request_stats (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    )
+'''
+
+
+def _stat_upsert(dimension, row, sign):
+    name, value, condition = dimension
+    where = condition.format(row=row) if condition else "true"
+    return (
+        f"INSERT INTO request_stats (dimension, value, count) "
+        f"SELECT '{name}', {value.format(row=row)}, {sign} WHERE {where} "
+        f"ON CONFLICT (dimension, value) DO UPDATE SET count = request_stats.count + excluded.count;"
+    )
+
+
+def _stat_upserts(dimensions, row, sign):
+    return "\n".join(_stat_upsert(d, row, sign) for d in dimensions)
+
+
+def _stat_backfill(dimension, table):
+    name, value, condition = dimension
+    grouped = "{row}" in value
+    sql = f"INSERT INTO request_stats (dimension, value, count) SELECT '{name}', {value.format(row='t')}, COUNT(*) FROM {table} t"
+    if condition:
+        sql += f" WHERE {condition.format(row='t')}"
+    if grouped:
+        sql += f" GROUP BY {value.format(row='t')}"
+    return sql
+
+
+def _stats_backfill():
+    return [CREATE_REQUEST_STATS] + [
+        _stat_backfill(d, "requests") for d in STAT_DIMENSIONS + [STATUS_DIMENSION]
+    ] + [_stat_backfill(USERS_DIMENSION, "users")]
+
+
+def _sqlite_stats_triggers():
+    all_dims = STAT_DIMENSIONS + [STATUS_DIMENSION]
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS request_stats_insert AFTER INSERT ON requests BEGIN\n"
+        f"{_stat_upserts(all_dims, 'NEW', 1)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS request_stats_delete AFTER DELETE ON requests BEGIN\n"
+        f"{_stat_upserts(all_dims, 'OLD', -1)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS request_stats_status AFTER UPDATE OF status ON requests "
+        f"WHEN OLD.status IS NOT NEW.status BEGIN\n"
+        f"{_stat_upserts([STATUS_DIMENSION], 'OLD', -1)}\n{_stat_upserts([STATUS_DIMENSION], 'NEW', 1)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS request_stats_update AFTER UPDATE OF {', '.join(STAT_COLUMNS)} "
+        f"ON requests BEGIN\n"
+        f"{_stat_upserts(STAT_DIMENSIONS, 'OLD', -1)}\n{_stat_upserts(STAT_DIMENSIONS, 'NEW', 1)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS users_stats_insert AFTER INSERT ON users BEGIN\n"
+        f"{_stat_upserts([USERS_DIMENSION], 'NEW', 1)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS users_stats_delete AFTER DELETE ON users BEGIN\n"
+        f"{_stat_upserts([USERS_DIMENSION], 'OLD', -1)}\nEND",
+    ]
+
+
+def _postgres_stats_triggers():
+    all_dims = STAT_DIMENSIONS + [STATUS_DIMENSION]
+    changed = " OR ".join(f"OLD.{c} IS DISTINCT FROM NEW.{c}" for c in STAT_COLUMNS)
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION request_stats_maintain() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_stat_upserts(all_dims, 'NEW', 1)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {_stat_upserts(all_dims, 'OLD', -1)}
+            ELSE
+                IF OLD.status IS DISTINCT FROM NEW.status THEN
+                    {_stat_upserts([STATUS_DIMENSION], 'OLD', -1)}
+                    {_stat_upserts([STATUS_DIMENSION], 'NEW', 1)}
+                END IF;
+                IF {changed} THEN
+                    {_stat_upserts(STAT_DIMENSIONS, 'OLD', -1)}
+                    {_stat_upserts(STAT_DIMENSIONS, 'NEW', 1)}
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION users_stats_maintain() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_stat_upserts([USERS_DIMENSION], 'NEW', 1)}
+            ELSE
+                {_stat_upserts([USERS_DIMENSION], 'OLD', -1)}
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS request_stats_maintain ON requests",
+        "CREATE TRIGGER request_stats_maintain AFTER INSERT OR DELETE OR UPDATE ON requests "
+        "FOR EACH ROW EXECUTE FUNCTION request_stats_maintain()",
+        "DROP TRIGGER IF EXISTS users_stats_maintain ON users",
+        "CREATE TRIGGER users_stats_maintain AFTER INSERT OR DELETE ON users "
+        "FOR EACH ROW EXECUTE FUNCTION users_stats_maintain()",
+    ]
+
+
+MIGRATIONS.append({
+    "version": 3,
+    "name": "statistiques_agregees",
+    # Remplissage initial puis triggers, dans la même transaction que la migration
+    "sqlite": _stats_backfill() + _sqlite_stats_triggers(),
+    "postgres": _stats_backfill() + _postgres_stats_triggers(),
+})
+
+MIGRATIONS.append({
+    "version": 4,
+    "name": "recherche_plein_texte",
+    # Index plein texte sur l'UE et le commentaire. SQLite : table FTS5 à contenu
+    # externe (le texte reste dans requests) synchronisée par triggers, puis
+    # remplie par 'rebuild'. PostgreSQL : tsvector généré et index GIN.
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5("
+        "nom_code_ue, comment, content='requests', content_rowid='request_id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS requests_fts_insert AFTER INSERT ON requests BEGIN\n"
+        "INSERT INTO requests_fts (rowid, nom_code_ue, comment) "
+        "VALUES (NEW.request_id, NEW.nom_code_ue, NEW.comment);\nEND",
+        "CREATE TRIGGER IF NOT EXISTS requests_fts_delete AFTER DELETE ON requests BEGIN\n"
+        "INSERT INTO requests_fts (requests_fts, rowid, nom_code_ue, comment) "
+        "VALUES ('delete', OLD.request_id, OLD.nom_code_ue, OLD.comment);\nEND",
+        "CREATE TRIGGER IF NOT EXISTS requests_fts_update AFTER UPDATE OF nom_code_ue, comment "
+        "ON requests BEGIN\n"
+        "INSERT INTO requests_fts (requests_fts, rowid, nom_code_ue, comment) "
+        "VALUES ('delete', OLD.request_id, OLD.nom_code_ue, OLD.comment);\n"
+        "INSERT INTO requests_fts (rowid, nom_code_ue, comment) "
+        "VALUES (NEW.request_id, NEW.nom_code_ue, NEW.comment);\nEND",
+        "INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')",
+    ],
+    "postgres": [
+        "ALTER TABLE requests ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(nom_code_ue, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(comment, '')), 'B')) STORED",
+        "CREATE INDEX IF NOT EXISTS idx_requests_search ON requests USING GIN (search)",
+    ],
+})
+
+PG_MIGRATION_LOCK_ID = 7_423_001
+
+CREATE_MIGRATIONS_TABLE = {
+    "sqlite": '''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    "postgres": '''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT now()
+        )
+    ''',
+}
+
+
+def statements_for(migration, dialect):
+    """Instructions SQL d'une migration pour un dialecte donné"""
+    return migration.get(dialect, migration["sqlite"])
+
+
+def apply_sqlite(conn):
+    """Appliquer les migrations manquantes sur une connexion sqlite3"""
+    conn.execute(CREATE_MIGRATIONS_TABLE["sqlite"])
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    done = []
+    for migration in MIGRATIONS:
+        if migration["version"] in applied:
+            continue
+        # Une transaction par migration : schéma, remplissage et triggers sont
+        # visibles ensemble, et un autre processus ne peut pas l'appliquer en même temps
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (migration["version"],)
+            ).fetchone():
+                conn.rollback()
+                continue
+            for statement in statements_for(migration, "sqlite"):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                (migration["version"], migration["name"])
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        done.append(migration["version"])
+    return done
+
+
+async def apply_postgres(conn):
+    """Appliquer les migrations manquantes sur une connexion asyncpg"""
+    # Verrou consultatif : plusieurs instances peuvent démarrer en même temps
+    await conn.execute("SELECT pg_advisory_lock($1)", PG_MIGRATION_LOCK_ID)
+    try:
+        await conn.execute(CREATE_MIGRATIONS_TABLE["postgres"])
+        applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+        done = []
+        for migration in MIGRATIONS:
+            if migration["version"] in applied:
+                continue
+            async with conn.transaction():
+                for statement in statements_for(migration, "postgres"):
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                    migration["version"], migration["name"]
+                )
+            done.append(migration["version"])
+        return done
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", PG_MIGRATION_LOCK_ID)
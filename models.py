@@ -1,6 +1,27 @@
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, field_validator, Field
 import re
-from typing import Optional
+from typing import List, Optional
+
+# Motifs compilés une seule fois (fullmatch : pas besoin de ^...$)
+MATRICULE_PATTERN = re.compile(r"[\w.\-]*")
+PHONE_PATTERN = re.compile(r"[0-9]{9}")
+NAME_PATTERN = re.compile(r"[a-zA-ZÀ-ÿ\s\-']+")
+
+
+_FIELD_NAMES = {}
+
+
+def bind_form(form, model):
+    """Champs du formulaire connus du modèle ; les champs vides ou absents prennent leur valeur par défaut.
+
+    La conversion des types est celle de pydantic : "2" -> 2, et pour les cases
+    à cocher "true", "on", "1"... -> True (case décochée : champ absent -> False).
+    """
+    names = _FIELD_NAMES.get(model)
+    if names is None:
+        names = _FIELD_NAMES[model] = frozenset(model.model_fields)
+    return {name: value for name, value in form.items() if name in names and value != ""}
+
 
 class UserRegister(BaseModel):
     matricule: str
@@ -13,25 +34,28 @@ class UserRegister(BaseModel):
     # ⚠️ Plus besoin de troncature — argon2 n'a aucune limite de taille
     # Donc suppression complète du validator password
 
-    @validator('matricule')
+    @field_validator('matricule')
+    @classmethod
     def validate_matricule(cls, v):
         if len(v) > 15:
             raise ValueError('Le matricule ne peut pas dépasser 15 caractères')
-        if not all(c.isalnum() or c in ['-', '_', '.'] for c in v):
+        if not MATRICULE_PATTERN.fullmatch(v):
             raise ValueError('Le matricule peut contenir lettres, chiffres, tirets, underscores et points')
         return v
 
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
-        if not v.isdigit() or len(v) != 9:
+        if not PHONE_PATTERN.fullmatch(v):
             raise ValueError('Le téléphone doit contenir 9 chiffres')
         return v
 
-    @validator('name', 'last_name')
+    @field_validator('name', 'last_name')
+    @classmethod
     def validate_name(cls, v):
         if len(v) > 255:
             raise ValueError('Le nom ne peut pas dépasser 255 caractères')
-        if not re.match(r'^[a-zA-ZÀ-ÿ\s\-\']+$', v):
+        if not NAME_PATTERN.fullmatch(v):
             raise ValueError('Le nom ne peut contenir que des lettres, espaces, tirets et apostrophes')
         return v
 
@@ -55,38 +79,102 @@ class RequestSubmit(BaseModel):
     comment: Optional[str] = None
     just_p: bool = False
 
-    @validator('all_name')
+    @field_validator('all_name')
+    @classmethod
     def validate_all_name(cls, v):
         if len(v) > 255:
             raise ValueError('Le nom complet ne peut pas dépasser 255 caractères')
         return v
 
-    @validator('matricule')
+    @field_validator('matricule')
+    @classmethod
     def validate_matricule(cls, v):
         if len(v) > 15:
             raise ValueError('Le matricule ne peut pas dépasser 15 caractères')
         return v
 
-    @validator('cycle')
+    @field_validator('cycle')
+    @classmethod
     def validate_cycle(cls, v):
         if len(v) > 50:
             raise ValueError('Le cycle ne peut pas dépasser 50 caractères')
         return v
 
-    @validator('level')
+    @field_validator('level')
+    @classmethod
     def validate_level(cls, v):
         if not 0 <= v <= 32767:
             raise ValueError('Le niveau doit être entre 0 et 32767')
         return v
 
-    @validator('nom_code_ue')
+    @field_validator('nom_code_ue')
+    @classmethod
     def validate_nom_code_ue(cls, v):
         if len(v) > 2048:
             raise ValueError('Le nom/code UE est trop long')
         return v
 
-    @validator('comment')
+    @field_validator('comment')
+    @classmethod
     def validate_comment(cls, v):
         if v and len(v) > 5000:
             raise ValueError('Le commentaire ne peut pas dépasser 5000 caractères')
-        return v
\ No newline at end of file
+        return v
+
+
+
+# Cycle de vie d'une requête (voir processing.py)
+REQUEST_STATUSES = ('pending', 'in_progress', 'done', 'rejected')
+
+
+class ClaimRequest(BaseModel):
+    assignee: str
+    limit: int = 10
+
+    @field_validator('assignee')
+    @classmethod
+    def validate_assignee(cls, v):
+        if not v.strip() or len(v) > 100:
+            raise ValueError("L'agent doit faire entre 1 et 100 caractères")
+        return v.strip()
+
+    @field_validator('limit')
+    @classmethod
+    def validate_limit(cls, v):
+        if not 1 <= v <= 100:
+            raise ValueError('Entre 1 et 100 requêtes par prise en charge')
+        return v
+
+
+class StatusUpdate(BaseModel):
+    request_ids: List[int]
+    status: str
+    assignee: Optional[str] = None
+
+    @field_validator('status')
+    @classmethod
+    def validate_status(cls, v):
+        if v not in REQUEST_STATUSES:
+            raise ValueError('Statut inconnu (pending, in_progress, done, rejected)')
+        return v
+
+    @field_validator('request_ids')
+    @classmethod
+    def validate_request_ids(cls, v):
+        if not 1 <= len(v) <= 500:
+            raise ValueError('Entre 1 et 500 requêtes par mise à jour')
+        return v
+
+
+def _error_message(err):
+    # Erreur levée par nos validateurs : son message (en français), sans le préfixe "Value error, "
+    if err["type"] == "value_error" and "error" in err.get("ctx", {}):
+        return str(err["ctx"]["error"])
+    return err["msg"]
+
+
+def format_validation_error(e):
+    """Message court d'une ValidationError : « champ : erreur » séparés par des points-virgules"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])} : {_error_message(err)}" for err in e.errors()
+    )
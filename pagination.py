@@ -0,0 +1,79 @@
+# pagination.py - Pagination par clé (keyset) sur (created_at, request_id)
+"""Curseurs opaques pour parcourir les requêtes de la plus récente à la plus ancienne.
+
+Le curseur encode la clé ``(created_at, request_id)`` de la dernière ligne
+affichée ; la page suivante reprend strictement après elle grâce à l'index
+``idx_requests_user_created``, quel que soit le nombre de pages déjà vues.
+"""
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible"""
+
+
+def encode_cursor(row):
+    """Curseur pointant après ``row``"""
+    key = json.dumps([row["created_at"], row["request_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Clé ``(created_at, request_id)`` contenue dans un curseur"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, request_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), int(request_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Curseur de pagination invalide") from e
+
+
+class Page:
+    """État d'une page en cours de rendu.
+
+    ``next_cursor`` n'est connu qu'une fois la dernière ligne lue : le
+    template le consulte après sa boucle, quand le générateur est épuisé.
+    """
+
+    def __init__(self, size, cursor=None):
+        self.size = size
+        self.cursor = cursor
+        self.next_cursor = None
+        self._source = None
+        self._first = None
+
+    async def open(self, source):
+        """Lire la première ligne de ``source`` (page_size + 1 lignes au plus).
+
+        Les erreurs SQL surviennent ainsi avant l'envoi des en-têtes de la
+        réponse, et peuvent encore être affichées normalement.
+        """
+        self._source = source
+        try:
+            self._first = await source.__anext__()
+        except StopAsyncIteration:
+            self._first = None
+
+    async def rows(self):
+        """Relayer les lignes de la page en notant le curseur suivant"""
+        source, last = self._source, self._first
+        if source is None:
+            return
+        try:
+            if last is None:
+                return
+            yield last
+            count = 1
+            async for row in source:
+                if count == self.size:
+                    self.next_cursor = encode_cursor(last)
+                    break
+                count += 1
+                last = row
+                yield row
+        finally:
+            await source.aclose()
@@ -0,0 +1,71 @@
+# processing.py - File de traitement des requêtes par le personnel
+"""Prise en charge et traitement des requêtes.
+
+Une requête passe de ``pending`` à ``in_progress`` quand un agent la prend
+en charge (``claim``), puis à ``done`` ou ``rejected``. La prise en charge
+est une seule instruction ``UPDATE ... RETURNING`` sur l'index
+``idx_requests_status_created`` : plusieurs agents peuvent la lancer en
+même temps sans se voir attribuer la même requête (écrivain unique sous
+SQLite, ``FOR UPDATE SKIP LOCKED`` sous PostgreSQL).
+
+Une prise en charge plus ancienne que CLAIM_LEASE_SECONDS est considérée
+comme abandonnée et la requête retourne dans la file.
+"""
+import os
+import time
+
+import queries
+import user_cache
+from database import execute_returning, execute_query, get_backend
+from models import REQUEST_STATUSES as STATUSES
+
+FINAL_STATUSES = ("done", "rejected")
+
+CLAIM_LEASE_SECONDS = int(os.environ.get("CLAIM_LEASE_SECONDS", "1800"))
+# Taille maximale d'une mise à jour groupée (nombre de "?" dans IN (...))
+STATUS_UPDATE_MAX = 500
+
+# Verrouillage des lignes candidates selon le backend
+ROW_LOCK = {"sqlite": "", "postgres": "FOR UPDATE SKIP LOCKED"}
+
+
+def _timestamp(seconds=None):
+    # Même format que CURRENT_TIMESTAMP de SQLite, sur les deux backends
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+async def _invalidate(rows):
+    for user_id in {row["user_id"] for row in rows}:
+        await user_cache.invalidate(user_id)
+
+
+async def release_stale_claims(lease_seconds=CLAIM_LEASE_SECONDS):
+    """Remettre dans la file les prises en charge expirées"""
+    cutoff = _timestamp(time.time() - lease_seconds)
+    await execute_query(queries.RELEASE_STALE_CLAIMS, (cutoff,))
+
+
+async def claim(assignee, limit=10):
+    """Prendre en charge les ``limit`` plus anciennes requêtes en attente"""
+    await release_stale_claims()
+    sql = queries.CLAIM_PENDING_REQUESTS.format(lock=ROW_LOCK[get_backend().name])
+    rows = await execute_returning(sql, (assignee, _timestamp(), limit))
+    rows.sort(key=lambda row: (row["created_at"], row["request_id"]))
+    await _invalidate(rows)
+    return rows
+
+
+async def update_status(request_ids, status, assignee=None):
+    """Changer le statut de plusieurs requêtes ; renvoie les identifiants modifiés"""
+    if status not in STATUSES:
+        raise ValueError(f"Statut inconnu : {status}")
+    ids = sorted(set(request_ids))
+    if not ids:
+        return []
+    if len(ids) > STATUS_UPDATE_MAX:
+        raise ValueError(f"{STATUS_UPDATE_MAX} requêtes au plus par mise à jour")
+    processed_at = _timestamp() if status in FINAL_STATUSES else None
+    sql = queries.UPDATE_REQUESTS_STATUS.format(ids=", ".join("?" * len(ids)))
+    rows = await execute_returning(sql, (status, assignee, processed_at, *ids))
+    await _invalidate(rows)
+    return sorted(row["request_id"] for row in rows)
@@ -0,0 +1,135 @@
+# queries.py - Requêtes SQL de l'application
+"""Toutes les requêtes émises par les routes, au même endroit.
+
+Les routes importent ces constantes au lieu d'écrire le SQL en ligne ;
+``query_audit.py`` les parcourt pour vérifier leur plan d'exécution.
+"""
+
+USER_EXISTS = "SELECT user_id FROM users WHERE email = ? OR matricule = ?"
+
+INSERT_USER = (
+    "INSERT INTO users (matricule, name, last_name, email, phone, password) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+USER_FOR_LOGIN = (
+    "SELECT user_id, matricule, name, last_name, email, password "
+    "FROM users WHERE email = ? OR matricule = ?"
+)
+
+# Rehachage après changement de profil Argon2 (ignoré si le mot de passe a changé entre-temps)
+UPDATE_USER_PASSWORD = "UPDATE users SET password = ? WHERE user_id = ? AND password = ?"
+
+INSERT_REQUEST = """INSERT INTO requests
+    (user_id, all_name, matricule, cycle, level, nom_code_ue,
+     note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Import en masse : created_at est fourni pour conserver la date des requêtes historiques
+IMPORT_REQUEST = """INSERT INTO requests
+    (user_id, all_name, matricule, cycle, level, nom_code_ue,
+     note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+USER_ID_FOR_MATRICULE = "SELECT user_id FROM users WHERE matricule = ?"
+
+USER_ID_EXISTS = "SELECT user_id FROM users WHERE user_id = ?"
+
+# Export d'une période [début, fin[ dans l'ordre d'insertion (parcours complet attendu)
+EXPORT_REQUESTS = """
+    SELECT request_id, user_id, all_name, matricule, cycle, level, nom_code_ue,
+           note_exam, note_cc, note_tp, note_tpe, autre, comment,
+           just_p, created_at, status, assignee, processed_at
+    FROM requests
+    WHERE created_at >= ? AND created_at < ?
+    ORDER BY request_id
+"""
+
+# Pagination keyset de /my-requests : plus récentes d'abord, LIMIT = taille de page + 1
+USER_REQUESTS_PAGE = """
+    SELECT request_id, all_name, matricule, cycle, level, nom_code_ue,
+           note_exam, note_cc, note_tp, note_tpe, autre, comment,
+           just_p, created_at, status, processed_at
+    FROM requests
+    WHERE user_id = ?
+    ORDER BY created_at DESC, request_id DESC
+    LIMIT ?
+"""
+
+USER_REQUESTS_PAGE_AFTER = """
+    SELECT request_id, all_name, matricule, cycle, level, nom_code_ue,
+           note_exam, note_cc, note_tp, note_tpe, autre, comment,
+           just_p, created_at, status, processed_at
+    FROM requests
+    WHERE user_id = ? AND (created_at, request_id) < (?, ?)
+    ORDER BY created_at DESC, request_id DESC
+    LIMIT ?
+"""
+
+# File de traitement. {lock} vaut "FOR UPDATE SKIP LOCKED" sous PostgreSQL (plusieurs
+# agents en parallèle sans double prise en charge) ; sous SQLite, l'écriture est déjà
+# sérialisée (un seul écrivain), la clause est vide.
+CLAIM_PENDING_REQUESTS = """
+    UPDATE requests
+    SET status = 'in_progress', assignee = ?, claimed_at = ?
+    WHERE request_id IN (
+        SELECT request_id FROM requests
+        WHERE status = 'pending'
+        ORDER BY created_at, request_id
+        LIMIT ? {lock}
+    )
+    RETURNING request_id, user_id, all_name, matricule, cycle, level, nom_code_ue,
+              note_exam, note_cc, note_tp, note_tpe, autre, comment, just_p,
+              created_at, status, assignee, claimed_at
+"""
+
+# Prises en charge abandonnées (agent arrêté) : retour dans la file
+RELEASE_STALE_CLAIMS = """
+    UPDATE requests
+    SET status = 'pending', assignee = NULL, claimed_at = NULL
+    WHERE status = 'in_progress' AND claimed_at < ?
+"""
+
+# {ids} : une liste de "?" (un par request_id)
+UPDATE_REQUESTS_STATUS = """
+    UPDATE requests
+    SET status = ?, assignee = COALESCE(?, assignee), processed_at = ?
+    WHERE request_id IN ({ids})
+    RETURNING request_id, user_id
+"""
+
+# Recherche plein texte (voir search.py) : meilleurs résultats d'abord, l'UE pesant
+# plus que le commentaire ; ? = expression MATCH, LIMIT, OFFSET
+SEARCH_REQUESTS = """
+    SELECT r.request_id, r.user_id, r.all_name, r.matricule, r.cycle, r.level,
+           r.nom_code_ue, r.comment, r.status, r.created_at,
+           bm25(requests_fts, 5.0, 1.0) AS score
+    FROM requests_fts
+    JOIN requests r ON r.request_id = requests_fts.rowid
+    WHERE requests_fts MATCH ?
+    ORDER BY score, r.request_id
+    LIMIT ? OFFSET ?
+"""
+
+# Variante PostgreSQL (non auditée par query_audit.py) ; ? = expression to_tsquery
+SEARCH_REQUESTS_PG = """
+    SELECT request_id, user_id, all_name, matricule, cycle, level,
+           nom_code_ue, comment, status, created_at,
+           ts_rank(search, query) AS score
+    FROM requests, to_tsquery('simple', ?) AS query
+    WHERE search @@ query
+    ORDER BY score DESC, request_id
+    LIMIT ? OFFSET ?
+"""
+
+REBUILD_SEARCH_INDEX = "INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')"
+
+OPTIMIZE_SEARCH_INDEX = "INSERT INTO requests_fts (requests_fts) VALUES ('optimize')"
+
+REBUILD_SEARCH_INDEX_PG = "REINDEX INDEX idx_requests_search"
+
+# Statistiques pré-agrégées (table request_stats, tenue à jour par triggers)
+STATS_TOTALS = "SELECT dimension, count FROM request_stats WHERE dimension IN ('total', 'users')"
+
+# Parcours complet voulu : une ligne par UE, cycle/niveau, jour… et non par requête
+STATS_SUMMARY = "SELECT dimension, value, count FROM request_stats WHERE count > 0 ORDER BY dimension, value"
@@ -0,0 +1,114 @@
+# query_audit.py - Audit des plans d'exécution SQLite
+"""Passer chaque requête de ``queries.py`` dans ``EXPLAIN QUERY PLAN``.
+
+Signale les parcours complets de table (``SCAN``) et les tris en table
+temporaire (``USE TEMP B-TREE``). Ceux qui sont voulus sont déclarés, avec
+leur raison, dans ``EXPECTED_PLANS`` : ils sont affichés comme attendus et
+``--strict`` n'échoue que sur les autres (régressions). Sans ``--db``,
+l'audit se fait sur une base en mémoire créée avec le schéma et toutes les
+migrations.
+
+Usage : python query_audit.py [--db university_requests.db] [--strict]
+"""
+import argparse
+import sqlite3
+import sys
+
+import migrations
+import queries
+
+
+def app_queries():
+    """Requêtes SQLite déclarées dans queries.py, par nom (variantes *_PG exclues)"""
+    return {
+        name: value for name, value in vars(queries).items()
+        if name.isupper() and isinstance(value, str) and not name.endswith("_PG")
+    }
+
+
+# Valeurs des gabarits de queries.py ({ids}, {lock}) pour l'audit SQLite
+TEMPLATE_VALUES = {"ids": "?", "lock": ""}
+
+# Parcours et tris voulus : requête -> (étapes du plan admises, raison)
+EXPECTED_PLANS = {
+    "EXPORT_REQUESTS": (
+        {"SCAN requests"},
+        "export d'une période entière, lu dans l'ordre de la clé primaire (aucun tri)",
+    ),
+    "SEARCH_REQUESTS": (
+        {"USE TEMP B-TREE FOR ORDER BY"},
+        "tri par score bm25, calculé à la volée sur les seules lignes trouvées par MATCH",
+    ),
+    "STATS_SUMMARY": (
+        {"SCAN request_stats USING INDEX sqlite_autoindex_request_stats_1"},
+        "table de compteurs (quelques dizaines de lignes) lue en entier dans l'ordre de l'index",
+    ),
+}
+
+
+def audit_query(conn, sql, expected=()):
+    """Plan d'une requête, problèmes détectés et problèmes attendus (étapes de ``expected``)"""
+    sql = sql.format(**TEMPLATE_VALUES) if "{" in sql else sql
+    params = (None,) * sql.count("?")
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    issues, accepted = [], []
+    for detail in plan:
+        # "SCAN t VIRTUAL TABLE INDEX n:..." : recherche via l'index du module (FTS5 MATCH)
+        if detail.startswith("SCAN ") and "VIRTUAL TABLE INDEX" not in detail:
+            issue = f"parcours complet : {detail}"
+        elif detail.startswith("USE TEMP B-TREE"):
+            issue = f"tri temporaire : {detail}"
+        else:
+            continue
+        (accepted if detail in expected else issues).append(issue)
+    return plan, issues, accepted
+
+
+def audit(conn, named_queries=None, expected_plans=EXPECTED_PLANS):
+    """Auditer toutes les requêtes de l'application"""
+    named_queries = named_queries or app_queries()
+    report = []
+    for name, sql in named_queries.items():
+        expected, reason = expected_plans.get(name, ((), None))
+        plan, issues, accepted = audit_query(conn, sql, expected)
+        report.append({"name": name, "plan": plan, "issues": issues, "accepted": accepted,
+                       "reason": reason if accepted else None})
+    return report
+
+
+def open_database(path=None):
+    if path:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn = sqlite3.connect(":memory:")
+    for statement in migrations.BASE_SCHEMA["sqlite"]:
+        conn.execute(statement)
+    migrations.apply_sqlite(conn)
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="base à auditer (par défaut : schéma en mémoire)")
+    parser.add_argument("--strict", action="store_true",
+                        help="code de sortie 1 si un problème non attendu est détecté")
+    args = parser.parse_args()
+
+    conn = open_database(args.db)
+    report = audit(conn)
+    flagged = expected = 0
+    for entry in report:
+        status = "À VÉRIFIER" if entry["issues"] else "ATTENDU" if entry["accepted"] else "OK"
+        print(f"[{status}] {entry['name']}")
+        for detail in entry["plan"]:
+            print(f"    {detail}")
+        if entry["reason"]:
+            print(f"    -> {entry['reason']}")
+        flagged += bool(entry["issues"])
+        expected += bool(entry["accepted"]) and not entry["issues"]
+    print(f"{flagged} requête(s) signalée(s) sur {len(report)} ({expected} plan(s) attendu(s))")
+    if args.strict and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# ratelimit.py - Limitation de débit par seau à jetons
+"""Limitation de débit des routes coûteuses (connexion, inscription, soumission).
+
+Chaque règle est un seau à jetons : ``capacity`` jetons au plus, rechargés
+à raison de ``capacity`` par ``period`` secondes. Une règle s'applique à une
+clé (adresse IP, matricule ou user_id) ; une requête consomme un jeton ou
+est refusée avec RateLimited (429 + Retry-After).
+
+Les règles se configurent par variable d'environnement, ``RATE_LIMIT_<RÈGLE>``
+au format ``"capacité/période"`` (``"0"`` désactive la règle) ;
+``RATE_LIMIT_ENABLED=0`` désactive tout. Le stockage est local au processus
+(``memory``) ou partagé entre workers via un fichier SQLite
+(``RATE_LIMIT_BACKEND=sqlite``, remplaçant local d'un stockage type Redis).
+Un stockage bloquant (``blocking``, le fichier SQLite peut attendre son
+verrou) est interrogé dans un thread, hors de la boucle d'événements.
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import metrics
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+# Adresse du client prise dans X-Forwarded-For (derrière un proxy de confiance uniquement)
+RATE_LIMIT_TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+# Attente maximale du verrou du fichier partagé, en millisecondes
+RATE_LIMIT_BUSY_TIMEOUT_MS = float(os.environ.get("RATE_LIMIT_BUSY_TIMEOUT_MS", "5000"))
+
+# Règles par défaut : "capacité/période en secondes"
+DEFAULT_RULES = {
+    # Plusieurs étudiants peuvent partager une adresse (NAT du campus) : limites par IP larges
+    "login_ip": "60/60",
+    "login_matricule": "10/300",
+    "register_ip": "20/600",
+    "submit_ip": "120/60",
+    "submit_user": "30/60",
+}
+
+rejected_total = metrics.Counter("rate_limit_rejected_total", "Requêtes refusées par limitation de débit", ("rule",))
+
+
+class RateLimited(Exception):
+    """Limite atteinte : la requête peut être retentée après ``retry_after`` secondes"""
+
+    def __init__(self, retry_after):
+        super().__init__("Trop de tentatives, veuillez réessayer plus tard")
+        self.retry_after = retry_after
+
+
+def parse_rule(value):
+    """``"capacité/période"`` -> (capacité, jetons par seconde) ; None si la règle est désactivée"""
+    capacity, _, period = value.partition("/")
+    capacity = int(capacity)
+    if capacity <= 0:
+        return None
+    return capacity, capacity / float(period or 1)
+
+
+def load_rules():
+    return {
+        name: parse_rule(os.environ.get(f"RATE_LIMIT_{name.upper()}", default))
+        for name, default in DEFAULT_RULES.items()
+    }
+
+
+class MemoryBucketStore:
+    """Seaux locaux au processus, en O(1) par appel.
+
+    Les seaux sont rangés par dernière utilisation ; à chaque appel, quelques
+    seaux parmi les plus anciens sont supprimés s'ils sont de nouveau pleins
+    (les supprimer ne change rien). Au-delà de ``maxsize`` clés, le plus
+    ancien est supprimé.
+    """
+
+    SWEEP = 4
+    blocking = False
+
+    def __init__(self, maxsize=RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        """Consommer ``cost`` jetons ; renvoie 0 si c'est possible, sinon l'attente en secondes"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._data.pop(key, None)
+            tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            # [jetons, mise à jour, instant où le seau sera plein]
+            self._data[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._sweep(now)
+        return wait
+
+    def _sweep(self, now):
+        for _ in range(self.SWEEP):
+            key, state = next(iter(self._data.items()))
+            if state[2] > now and len(self._data) <= self.maxsize:
+                break
+            del self._data[key]
+
+    def stats(self):
+        return {"backend": "memory", "keys": len(self._data), "maxsize": self.maxsize}
+
+
+class SQLiteBucketStore:
+    """Seaux partagés par plusieurs workers dans un fichier SQLite.
+
+    Remplaçant local d'un stockage partagé : la recharge et la consommation
+    se font en une seule instruction (UPSERT ... RETURNING), donc de façon
+    atomique entre processus. Les appels peuvent attendre le verrou du
+    fichier jusqu'à ``busy_timeout`` secondes (``blocking``).
+    """
+
+    TRIM_EVERY = 100
+    blocking = True
+
+    TAKE = """
+        INSERT INTO rate_buckets (key, tokens, updated, full_at)
+        VALUES (:key, :capacity - :cost, :now, :now + :cost / :rate)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = MIN(:capacity, tokens + (:now - updated) * :rate) - :cost,
+            updated = :now,
+            full_at = :now + (:capacity - MIN(:capacity, tokens + (:now - updated) * :rate) + :cost) / :rate
+        WHERE MIN(:capacity, tokens + (:now - updated) * :rate) >= :cost
+        RETURNING tokens
+    """
+
+    def __init__(self, path, busy_timeout=RATE_LIMIT_BUSY_TIMEOUT_MS / 1000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._writes = 0
+        self._lock = Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                # Seaux perdus en cas de coupure : sans importance, pas de fsync à chaque écriture
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS rate_buckets (
+                        key TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated REAL NOT NULL,
+                        full_at REAL NOT NULL
+                    )
+                ''')
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def take(self, key, capacity, rate, cost=1):
+        # Horloge murale : commune à tous les processus
+        now = time.time()
+        params = {"key": key, "capacity": capacity, "rate": rate, "cost": cost, "now": now}
+        with self._lock:
+            conn = self._connection()
+            if conn.execute(self.TAKE, params).fetchone() is not None:
+                self._after_write(now)
+                return 0.0
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+            ).fetchone()
+        return (cost - min(capacity, tokens + (now - updated) * rate)) / rate
+
+    def _after_write(self, now):
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self._connection().execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+
+    def stats(self):
+        with self._lock:
+            keys = self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "keys": keys}
+
+
+def create_store(backend=None, path=None):
+    """Stockage choisi par RATE_LIMIT_BACKEND ("memory" par défaut, ou "sqlite")"""
+    backend = backend or os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    if backend == "sqlite":
+        return SQLiteBucketStore(path or os.environ.get("RATE_LIMIT_PATH", "ratelimit.db"))
+    return MemoryBucketStore()
+
+
+class RateLimiter:
+    """Règles nommées appliquées à un stockage de seaux"""
+
+    def __init__(self, store=None, rules=None, enabled=RATE_LIMIT_ENABLED):
+        self.store = store if store is not None else create_store()
+        self.rules = rules if rules is not None else load_rules()
+        self.enabled = enabled
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, rule, key, cost=1):
+        """Consommer ``cost`` jetons de ``rule`` pour ``key`` ; lève RateLimited s'il en manque.
+
+        Un coût supérieur à la capacité de la règle est toujours refusé.
+        """
+        limits = self.rules.get(rule)
+        if not self.enabled or limits is None:
+            return
+        if self.store.blocking:
+            wait = await asyncio.to_thread(self.store.take, f"{rule}:{key}", *limits, cost)
+        else:
+            wait = self.store.take(f"{rule}:{key}", *limits, cost)
+        if wait > 0:
+            self.rejected += 1
+            rejected_total.inc(rule=rule)
+            raise RateLimited(max(1, math.ceil(wait)))
+        self.allowed += 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "rules": {name: f"{limits[0]}/{round(limits[0] / limits[1])}" if limits else None
+                      for name, limits in self.rules.items()},
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "store": self.store.stats(),
+        }
+
+
+def client_ip(request):
+    """Adresse du client (première adresse de X-Forwarded-For si RATE_LIMIT_TRUST_PROXY=1)"""
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+limiter = RateLimiter()
@@ -0,0 +1,68 @@
+# search.py - Recherche plein texte dans les requêtes (UE et commentaire)
+"""Recherche classée par pertinence, avec préfixes et pagination.
+
+Le texte saisi est découpé en mots ; chaque mot est cherché comme préfixe
+(« algo » trouve « algorithmique ») et tous doivent être présents. Sous
+SQLite, l'index est la table FTS5 ``requests_fts`` (classement bm25) ;
+sous PostgreSQL, la colonne ``search`` et son index GIN (``ts_rank``).
+
+Usage : python search.py rebuild   (reconstruire l'index sur les données existantes)
+"""
+import asyncio
+import re
+import sys
+
+import queries
+from database import execute_query, fetch_all, get_backend
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Au-delà, affiner la recherche plutôt que paginer
+MAX_OFFSET = 1000
+MAX_TERMS = 8
+
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(text, dialect="sqlite"):
+    """Expression de recherche (FTS5 MATCH ou to_tsquery) ; None si aucun mot"""
+    terms = _WORD.findall(text.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    if dialect == "postgres":
+        return " & ".join(f"{term}:*" for term in terms)
+    # Mots entre guillemets : la syntaxe FTS5 (AND, NEAR, colonnes...) n'est pas interprétée
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+async def search(text, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Une page de résultats et l'indicateur de page suivante"""
+    dialect = get_backend().name
+    expression = match_expression(text, dialect)
+    offset = (page - 1) * page_size
+    if expression is None or offset > MAX_OFFSET:
+        return [], False
+    query = queries.SEARCH_REQUESTS_PG if dialect == "postgres" else queries.SEARCH_REQUESTS
+    rows = await fetch_all(query, (expression, page_size + 1, offset))
+    return rows[:page_size], len(rows) > page_size
+
+
+async def rebuild():
+    """Reconstruire l'index plein texte à partir de la table requests"""
+    if get_backend().name == "postgres":
+        await execute_query(queries.REBUILD_SEARCH_INDEX_PG)
+        return
+    await execute_query(queries.REBUILD_SEARCH_INDEX)
+    await execute_query(queries.OPTIMIZE_SEARCH_INDEX)
+
+
+def main():
+    if sys.argv[1:] != ["rebuild"]:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    asyncio.run(rebuild())
+    print("Index de recherche reconstruit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# serve.py - Lancement en production : plusieurs processus uvicorn
+"""Serveur multi-processus sur la même base.
+
+Chaque worker est un processus indépendant : son pool de connexions, son
+thread d'écriture et ses exécuteurs sont créés dans le processus (rien n'est
+hérité du parent). SQLite sérialise les écritures entre processus (mode WAL,
+busy_timeout et nouveaux essais, voir database.py).
+
+Avant de lancer les workers :
+- le schéma et les migrations sont appliqués une seule fois, ici ;
+- les caches et limites de débit partagés passent sur des fichiers SQLite à
+  côté de la base (CACHE_BACKEND, RATE_LIMIT_BACKEND), sauf configuration
+  explicite : un cache local à un worker ne verrait pas les invalidations
+  des autres ;
+- les threads de hachage sont répartis entre les workers (PASSWORD_WORKERS).
+
+gunicorn fonctionne aussi (``gunicorn -w 4 -k uvicorn.workers.UvicornWorker
+app:app``) : le schéma est alors préparé au démarrage des workers, sous un
+verrou de fichier ; les variables ci-dessus sont à fixer soi-même.
+
+Usage : python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import os
+import sys
+
+import uvicorn
+
+
+def default_workers():
+    return int(os.environ.get("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+
+
+def configure(workers):
+    """Variables d'environnement héritées par les workers"""
+    cpus = os.cpu_count() or 1
+    os.environ.setdefault("PASSWORD_WORKERS", str(max(1, cpus // workers)))
+    if workers == 1 or os.environ.get("DB_BACKEND", "sqlite") != "sqlite":
+        return
+    if os.environ.get("DB_CONCURRENCY", "wal") != "wal":
+        sys.exit("DB_CONCURRENCY=lock ne protège qu'un seul processus : utiliser le mode wal")
+    from database import get_db_path
+
+    base = os.path.splitext(os.path.abspath(get_db_path()))[0]
+    os.environ.setdefault("CACHE_BACKEND", "sqlite")
+    os.environ.setdefault("CACHE_PATH", f"{base}.cache.db")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+    os.environ.setdefault("RATE_LIMIT_PATH", f"{base}.ratelimit.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=default_workers(), help="processus (défaut : nombre de cœurs)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    configure(args.workers)
+    if os.environ.get("DB_BACKEND", "sqlite") == "sqlite":
+        import database
+
+        database.init_db()
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# templating.py - Environnements Jinja2 de l'application
+"""Templates précompilés : cache de bytecode sur disque, préchauffage et mesures.
+
+Le cache de bytecode évite de recompiler les templates à chaque démarrage
+(fréquent sur Vercel). Les environnements synchrone (réponses classiques)
+et asynchrone (pages rendues en flux) génèrent un code différent pour un
+même fichier : chacun a donc son propre répertoire de cache.
+
+Jinja n'est importé qu'au premier accès à ``templates`` ou
+``stream_templates``, pour ne pas alourdir l'import de l'application.
+"""
+import os
+import tempfile
+import time
+from threading import Lock
+
+from metrics import TimingStats
+
+TEMPLATE_DIR = "templates"
+
+# En production les templates ne changent pas : inutile de vérifier leur date à chaque rendu.
+# Rechargement des templates (et cache des pages publiques coupé) avec APP_ENV=development
+APP_ENV = os.environ.get("APP_ENV", "production")
+TEMPLATE_AUTO_RELOAD = os.environ.get(
+    "TEMPLATE_AUTO_RELOAD", "1" if APP_ENV == "development" else "0"
+) == "1"
+TEMPLATE_CACHE_DIR = os.environ.get(
+    "TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "university-requests-jinja")
+)
+
+# Templates compilés au démarrage (environnement synchrone / asynchrone)
+WARM_UP_TEMPLATES = [
+    "base.html",
+    "dashboard.html",
+    "login.html",
+    "register.html",
+    "submit_request.html",
+    "my-requests.html",
+]
+WARM_UP_STREAM_TEMPLATES = ["my-requests.html"]
+
+# Préchauffage au démarrage ; à 0, la compilation a lieu au premier rendu
+TEMPLATE_WARM_UP = os.environ.get("TEMPLATE_WARM_UP", "1") == "1"
+
+render_stats = {}
+
+
+def _record(name, seconds):
+    stats = render_stats.get(name)
+    if stats is None:
+        stats = render_stats.setdefault(name, TimingStats())
+    stats.record(seconds)
+
+
+def _bytecode_cache(kind):
+    from jinja2 import FileSystemBytecodeCache
+
+    directory = os.path.join(TEMPLATE_CACHE_DIR, kind)
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        # Système de fichiers en lecture seule : on se passe du cache disque
+        return None
+    return FileSystemBytecodeCache(directory)
+
+
+def _create_templates():
+    from fastapi.templating import Jinja2Templates
+
+    class TimedTemplates(Jinja2Templates):
+        """Jinja2Templates qui mesure la durée de rendu de chaque template"""
+
+        def TemplateResponse(self, name, context, *args, **kwargs):
+            start = time.perf_counter()
+            response = super().TemplateResponse(name, context, *args, **kwargs)
+            _record(name, time.perf_counter() - start)
+            return response
+
+    from http_cache import static_url
+
+    templates = TimedTemplates(
+        directory=TEMPLATE_DIR,
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+        bytecode_cache=_bytecode_cache("sync"),
+    )
+    templates.env.globals["static_url"] = static_url
+    return templates
+
+
+def _create_stream_templates():
+    from jinja2 import Environment, FileSystemLoader
+
+    from http_cache import static_url
+
+    # Environnement asynchrone pour les pages rendues en flux
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        enable_async=True,
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+        bytecode_cache=_bytecode_cache("async"),
+    )
+    env.globals["static_url"] = static_url
+    return env
+
+
+class _Lazy:
+    """Objet créé au premier accès à l'un de ses attributs"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = Lock()
+
+    def __getattr__(self, name):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return getattr(self._instance, name)
+
+
+templates = _Lazy(_create_templates)
+stream_templates = _Lazy(_create_stream_templates)
+
+
+async def stream_template(name, context):
+    """Rendu en flux d'un template, durée mesurée jusqu'au dernier fragment"""
+    start = time.perf_counter()
+    async for chunk in stream_templates.get_template(name).generate_async(context):
+        yield chunk
+    _record(f"{name} (flux)", time.perf_counter() - start)
+
+
+def warm_up():
+    """Compiler à l'avance les templates de l'application (et remplir le cache disque)"""
+    start = time.perf_counter()
+    for name in WARM_UP_TEMPLATES:
+        templates.get_template(name)
+    for name in WARM_UP_STREAM_TEMPLATES:
+        stream_templates.get_template(name)
+    return time.perf_counter() - start
+
+
+def render_report():
+    """Durées de rendu par template, du plus lent au plus rapide (moyenne)"""
+    report = {name: stats.snapshot() for name, stats in list(render_stats.items())}
+    return dict(sorted(report.items(), key=lambda item: item[1]["avg_ms"], reverse=True))
@@ -0,0 +1,19 @@
+"""Parité des backends : le scénario de benchmarks/backend_parity.py donne le résultat attendu partout."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import backend_parity  # noqa: E402
+
+N_REQUESTS = 50
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "postgres"])
+def test_backend_parity(backend):
+    if backend == "postgres" and not os.environ.get("DATABASE_URL"):
+        pytest.skip("DATABASE_URL non défini : PostgreSQL indisponible")
+    run = backend_parity.run_backend(backend, N_REQUESTS)
+    assert backend_parity.mismatches(run["result"], N_REQUESTS) == []
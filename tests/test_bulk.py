@@ -0,0 +1,21 @@
+"""Import en masse : created_at est validé et normalisé comme les bornes d'export."""
+import pytest
+
+import bulk
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "maintenant"),
+    ("2026-01-02", "2026-01-02 00:00:00"),
+    ("2026-01-02 10:00:00", "2026-01-02 10:00:00"),
+    ("2026-01-02T10:00:00Z", "2026-01-02 10:00:00"),
+    ("2026-01-02T10:00:00+02:00", "2026-01-02 08:00:00"),
+])
+def test_timestamp_normalized(value, expected):
+    assert bulk._timestamp(value, "maintenant") == expected
+
+
+@pytest.mark.parametrize("value", ["2026", 2026, "02/01/2026"])
+def test_timestamp_invalid(value):
+    with pytest.raises(ValueError, match="Date invalide"):
+        bulk._timestamp(value, "maintenant")
@@ -0,0 +1,37 @@
+"""Formulaires : les erreurs de validation sont affichées en français, sans le texte de pydantic."""
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module.limiter, "enabled", False)
+    client = TestClient(app_module.app)
+    client.cookies.set("user_data", app_module.create_user_cookie({
+        "user_id": 1, "matricule": "20L1234", "name": "Marie", "last_name": "Curie", "email": "m@example.org",
+    }))
+    return client
+
+
+def assert_french_error(response, message):
+    assert response.status_code == 200
+    assert message in response.text
+    assert "errors.pydantic.dev" not in response.text
+    assert "Value error" not in response.text
+
+
+def test_register_validation_error(client):
+    response = client.post("/register", data={
+        "matricule": "20L9999", "name": "Jean 2", "last_name": "Dupont", "email": "jean@example.org",
+        "phone": "61234", "password": "correct horse battery",
+    })
+    assert_french_error(response, "Le téléphone doit contenir 9 chiffres")
+
+
+def test_submit_request_validation_error(client):
+    response = client.post("/submit-request", data={
+        "cycle": "Licence", "level": "40000", "nom_code_ue": "INF-101 Algorithmique",
+    })
+    assert_french_error(response, "level : Le niveau doit être entre 0 et 32767")
@@ -0,0 +1,66 @@
+"""Base saturée : les routes de formulaire répondent 503 + Retry-After, pas 200 avec l'erreur."""
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+import database
+from database import DB_RETRY_AFTER, WriteQueueFull
+
+USER = {"user_id": 1, "matricule": "20L1234", "name": "Marie", "last_name": "Curie",
+        "email": "marie@example.org"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module.limiter, "enabled", False)
+    client = TestClient(app_module.app)
+    client.cookies.set("user_data", app_module.create_user_cookie(USER))
+    return client
+
+
+@pytest.fixture
+def reads_rejected(monkeypatch):
+    # Plus aucune place dans l'exécuteur de lecture : DatabaseBusy immédiat
+    monkeypatch.setattr(database.db_executor, "max_pending", 0)
+
+
+@pytest.fixture
+def writes_rejected(monkeypatch):
+    async def queue_full(*args, **kwargs):
+        raise WriteQueueFull("File d'écriture pleine")
+    monkeypatch.setattr(app_module, "execute_grouped", queue_full)
+    monkeypatch.setattr(app_module, "execute_many", queue_full)
+
+
+def assert_busy(response):
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(DB_RETRY_AFTER)
+
+
+def test_register_busy(client, reads_rejected):
+    assert_busy(client.post("/register", data={
+        "matricule": "20L9999", "name": "Jean", "last_name": "Dupont", "email": "jean@example.org",
+        "phone": "612345678", "password": "correct horse battery",
+    }))
+
+
+def test_login_busy(client, reads_rejected):
+    assert_busy(client.post("/login", data={"login": "20L1234", "password": "correct horse battery"}))
+
+
+def test_my_requests_busy(client, reads_rejected):
+    response = client.get("/my-requests")
+    assert_busy(response)
+    assert "surchargée" in response.text
+
+
+def test_submit_request_busy(client, writes_rejected):
+    assert_busy(client.post("/submit-request", data={
+        "cycle": "Licence", "level": "2", "nom_code_ue": "INF-101 Algorithmique", "note_cc": "true",
+    }, follow_redirects=False))
+
+
+def test_submit_requests_busy(client, writes_rejected):
+    assert_busy(client.post("/submit-requests", json={
+        "cycle": "Licence", "level": 2, "items": [{"nom_code_ue": "INF-101"}],
+    }))
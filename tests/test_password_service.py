@@ -0,0 +1,26 @@
+"""Service de hachage : la mort d'un worker du pool de processus n'est pas définitive."""
+import asyncio
+import os
+import signal
+
+import auth
+
+
+def test_recovers_from_killed_worker():
+    service = auth.PasswordService(workers=1, max_pending=4, kind="process")
+
+    async def scenario():
+        hashed = await service.hash("correct horse battery")
+        # Worker tué (mémoire épuisée, kill) : le ProcessPoolExecutor est cassé
+        for pid in list(service._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        assert await service.verify("correct horse battery", hashed)
+        return await service.hash("autre mot de passe")
+
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        service.shutdown()
+    assert service.kind == "process"
+    assert service.restarts == 1
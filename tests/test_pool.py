@@ -0,0 +1,29 @@
+"""Pool de connexions : une lecture annulée pendant l'attente ne garde pas de connexion."""
+import asyncio
+
+import database
+
+
+def test_acquire_cancelled_while_waiting(tmp_path):
+    pool = database.ConnectionPool(str(tmp_path / "pool.db"), size=1, timeout=5)
+
+    async def scenario():
+        held = pool.acquire()
+        # Pool plein : le thread de l'exécuteur attend une connexion
+        waiting = asyncio.ensure_future(database._acquire(pool))
+        await asyncio.sleep(0.1)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        # La connexion rendue passe au thread en attente, qui doit la rendre à son tour
+        pool.release(held)
+        for _ in range(100):
+            if asyncio.all_tasks() == {asyncio.current_task()}:
+                break
+            await asyncio.sleep(0.01)
+        return waiting
+
+    waiting = asyncio.run(scenario())
+    assert waiting.cancelled()
+    assert len(pool._idle) == 1 and pool._created == 1
+    # Le pool reste utilisable
+    pool.release(pool.acquire())
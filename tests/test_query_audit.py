@@ -0,0 +1,17 @@
+"""Audit des plans : seuls les parcours et tris non déclarés dans EXPECTED_PLANS sont signalés."""
+import query_audit
+
+
+def test_app_queries_have_no_unexpected_plan():
+    report = query_audit.audit(query_audit.open_database())
+    assert [entry["name"] for entry in report if entry["issues"]] == []
+    # Chaque plan déclaré attendu est encore rencontré (sinon l'entrée est à retirer)
+    accepted = {entry["name"] for entry in report if entry["accepted"]}
+    assert accepted == set(query_audit.EXPECTED_PLANS)
+
+
+def test_missing_index_is_reported():
+    conn = query_audit.open_database()
+    conn.execute("DROP INDEX idx_requests_user_created")
+    report = {entry["name"]: entry for entry in query_audit.audit(conn)}
+    assert report["USER_REQUESTS_PAGE"]["issues"]
@@ -0,0 +1,66 @@
+"""Seaux partagés SQLite : l'attente du verrou se fait hors de la boucle d'événements."""
+import asyncio
+import sqlite3
+
+import pytest
+
+import ratelimit
+
+
+def test_sqlite_store_waits_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    limiter = ratelimit.RateLimiter(ratelimit.SQLiteBucketStore(path), rules={"login_ip": (1, 1 / 60)},
+                                    enabled=True)
+
+    async def scenario():
+        await limiter.check("login_ip", "a")
+
+        # Un autre worker garde le verrou d'écriture pendant 0,3 s
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        asyncio.get_running_loop().call_later(0.3, other.execute, "ROLLBACK")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            # Le seau est vide : la limite s'applique malgré le verrou (pas de passage par défaut)
+            with pytest.raises(ratelimit.RateLimited):
+                await limiter.check("login_ip", "a")
+        finally:
+            task.cancel()
+            other.close()
+        assert ticks >= 10, "boucle d'événements bloquée pendant l'attente du verrou"
+
+    asyncio.run(scenario())
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_batch_submission_charges_one_token_per_item(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+
+    limiter = ratelimit.RateLimiter(ratelimit.MemoryBucketStore(),
+                                    rules={"submit_ip": None, "submit_user": (30, 30 / 60)}, enabled=True)
+    monkeypatch.setattr(app_module, "limiter", limiter)
+
+    async def inserted(query, params):
+        return len(params)
+    monkeypatch.setattr(app_module, "execute_many", inserted)
+
+    client = TestClient(app_module.app)
+    client.cookies.set("user_data", app_module.create_user_cookie({
+        "user_id": 1, "matricule": "20L1234", "name": "Marie", "last_name": "Curie", "email": "m@example.org",
+    }))
+    batch = {"cycle": "Licence", "level": 2, "items": [{"nom_code_ue": f"INF-{i}"} for i in range(20)]}
+    assert client.post("/submit-requests", json=batch).status_code == 200
+    # 20 jetons consommés sur 30 : un second lot de 20 dépasse la limite par utilisateur
+    response = client.post("/submit-requests", json=batch)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 1
@@ -0,0 +1,27 @@
+"""Environnement par défaut : production (templates figés, cache des pages publiques actif)."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def settings(**env):
+    environ = {k: v for k, v in os.environ.items()
+               if k not in ("APP_ENV", "VERCEL", "TEMPLATE_AUTO_RELOAD", "PAGE_CACHE_ENABLED")}
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import http_cache, templating; "
+                               "print(templating.APP_ENV, templating.TEMPLATE_AUTO_RELOAD, http_cache.PAGE_CACHE_ENABLED)"],
+        cwd=ROOT, env=dict(environ, **env), text=True,
+    )
+    return output.split()
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, ["production", "False", "True"]),
+    ({"APP_ENV": "development"}, ["development", "True", "False"]),
+])
+def test_app_env(env, expected):
+    assert settings(**env) == expected
@@ -0,0 +1,38 @@
+"""Cache de /my-requests sur fichier SQLite : l'attente du verrou ne bloque pas la boucle."""
+import asyncio
+import sqlite3
+
+import cache
+import user_cache
+
+
+def test_invalidate_waits_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    monkeypatch.setattr(user_cache, "_store", cache.SQLiteStore(path))
+
+    async def scenario():
+        await user_cache.store_page(1, None, None, 20, [{"request_id": 1}])
+        version, rows = await user_cache.lookup(1, None, 20)
+        assert rows == [{"request_id": 1}]
+
+        # Un autre worker garde le verrou d'écriture pendant 0,3 s
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        asyncio.get_running_loop().call_later(0.3, other.execute, "ROLLBACK")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await user_cache.invalidate(1)
+        task.cancel()
+        other.close()
+        assert ticks >= 10, "boucle d'événements bloquée pendant l'attente du verrou"
+        return await user_cache.lookup(1, None, 20)
+
+    version, rows = asyncio.run(scenario())
+    assert version is not None and rows is None
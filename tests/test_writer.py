@@ -0,0 +1,18 @@
+"""Thread d'écriture SQLite : arrêt pendant une fenêtre de group commit."""
+import threading
+
+import database
+
+
+def test_close_during_group_commit_window(tmp_path, monkeypatch):
+    # Fenêtre longue : close() arrive pendant que le lot est encore ouvert
+    monkeypatch.setattr(database, "DB_GROUP_COMMIT_WINDOW_MS", 500)
+    writer = database.SQLiteWriter(str(tmp_path / "writer.db"))
+    future = writer.submit(lambda conn: conn.execute("SELECT 1").fetchone()[0], grouped=True)
+
+    closing = threading.Thread(target=writer.close, daemon=True)
+    closing.start()
+    closing.join(3)
+
+    assert not closing.is_alive(), "close() bloqué : signal d'arrêt perdu pendant le lot"
+    assert future.result(timeout=1) == 1
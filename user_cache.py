@@ -0,0 +1,106 @@
+# user_cache.py - Cache par utilisateur des pages de /my-requests
+"""Pages de « Mes requêtes » gardées en cache et invalidées à chaque écriture.
+
+Une entrée par utilisateur regroupe ses pages déjà lues (clé : curseur et
+taille de page). Toute écriture sur ses requêtes remplace l'entrée par une
+entrée vide de version nouvelle ; une lecture commencée avant l'écriture ne
+peut alors plus enregistrer ses lignes, devenues périmées (``replace`` ne
+réussit que si la version n'a pas bougé).
+
+Le stockage est choisi par CACHE_BACKEND : "memory" (par processus) ou
+"sqlite" (fichier partagé entre workers, voir ``cache.SQLiteStore``). Les
+accès à un stockage bloquant (``blocking``) se font dans un thread, hors de
+la boucle d'événements : la lecture ou l'écriture du fichier peut attendre
+son verrou.
+"""
+import asyncio
+import os
+import time
+
+from cache import create_store
+
+MY_REQUESTS_CACHE_SIZE = int(os.environ.get("MY_REQUESTS_CACHE_SIZE", "2000"))
+MY_REQUESTS_CACHE_TTL = float(os.environ.get("MY_REQUESTS_CACHE_TTL", "300"))
+# Pages gardées par utilisateur (les plus anciennes sont oubliées)
+MY_REQUESTS_CACHE_PAGES = int(os.environ.get("MY_REQUESTS_CACHE_PAGES", "10"))
+
+_store = None
+page_stats = {"hits": 0, "misses": 0}
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = create_store(MY_REQUESTS_CACHE_SIZE, MY_REQUESTS_CACHE_TTL)
+    return _store
+
+
+def _user_key(user_id):
+    return f"my-requests:{user_id}"
+
+
+def _page_key(cursor, size):
+    return f"{cursor or ''}|{size}"
+
+
+async def _call(fn, *args):
+    if get_store().blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def _lookup(user_id, cursor, size):
+    entry = get_store().get(_user_key(user_id))
+    version, rows = None, None
+    if entry is not None:
+        version, pages = entry
+        rows = pages.get(_page_key(cursor, size))
+    page_stats["misses" if rows is None else "hits"] += 1
+    return version, rows
+
+
+def _store_page(user_id, version, cursor, size, rows):
+    store = get_store()
+    key = _user_key(user_id)
+    entry = store.get(key)
+    current, pages = entry if entry is not None else (None, {})
+    if current != version:
+        return False
+    pages = dict(pages)
+    pages[_page_key(cursor, size)] = rows
+    while len(pages) > MY_REQUESTS_CACHE_PAGES:
+        del pages[next(iter(pages))]
+    return store.replace(key, version, 0 if version is None else version, pages)
+
+
+def _invalidate(user_id):
+    get_store().set(_user_key(user_id), time.time_ns(), {})
+
+
+async def lookup(user_id, cursor, size):
+    """``(version, lignes)`` ; ``lignes`` vaut None si la page n'est pas en cache"""
+    return await _call(_lookup, user_id, cursor, size)
+
+
+async def store_page(user_id, version, cursor, size, rows):
+    """Ajouter une page à l'entrée de l'utilisateur, si elle n'a pas été invalidée entre-temps"""
+    return await _call(_store_page, user_id, version, cursor, size, rows)
+
+
+async def invalidate(user_id):
+    """À appeler après toute écriture sur les requêtes de ``user_id``"""
+    await _call(_invalidate, user_id)
+
+
+async def replay(rows):
+    """Relire une page comme une source ``iter_rows`` (pour ``Page``)"""
+    for row in rows:
+        yield row
+
+
+def stats():
+    total = page_stats["hits"] + page_stats["misses"]
+    return {
+        "pages": dict(page_stats, hit_rate=round(page_stats["hits"] / total, 4) if total else 0.0),
+        "store": get_store().stats(),
+    }